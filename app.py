@@ -2,15 +2,22 @@ import streamlit as st
 import time
 import pandas as pd
 import os
+import json
 import matplotlib.pyplot as plt
 import seaborn as sns
 from datetime import datetime, timedelta
 from ics import Calendar, Event
 from src.simulation.models import UserProfile, TaskStatus
 from src.simulation.env import SimulationEnvironment
-from src.agent import AgenticPlanner
+from src.simulation.task_table import TaskTable
+from src.service import get_planner
 from src.memory import save_reflection
 from generate_dataset import generate_synthetic_tasks
+from src import profiling
+from src.analytics import AnalyticsStore
+from src.sweep import ResultCube, list_cubes, METRICS
+from src.anytime import AnytimePlan
+from src.config import load_config
 
 # --- HELPER: EXPORT TO CALENDAR ---
 def create_ics_file(tasks, start_hour):
@@ -32,7 +39,7 @@ st.set_page_config(page_title="Agentic Task Planner", page_icon="🧠", layout="
 st.title("🧠 Reflexion Agent: Autonomous Task Scheduler")
 
 # --- TABS CONFIGURATION ---
-tab1, tab2 = st.tabs(["🚀 Live Simulation", "📊 Research Analytics"])
+tab1, tab2, tab3 = st.tabs(["🚀 Live Simulation", "📊 Research Analytics", "🧪 Parameter Sweep"])
 
 # =========================================
 # TAB 1: LIVE SIMULATION
@@ -51,124 +58,162 @@ with tab1:
         st.header("🔬 Research Controls (Ablation)")
         use_reflexion = st.toggle("Enable Reflexion (Critic)", value=True)
         use_memory = st.toggle("Enable Long-Term Memory", value=True)
+        enable_profiling = st.toggle("Profile this run (phase timings)", value=False)
+        use_cprofile = st.checkbox("Attach cProfile per phase", value=False, disabled=not enable_profiling)
         
         st.divider()
+        server_url = st.text_input("Planning Service URL (optional)", value="",
+                                   help="e.g. http://127.0.0.1:8765 — leave empty to plan in-process")
+        latency_budget = st.number_input("Planning latency budget (ms)", min_value=0, max_value=60000, step=250,
+                                         value=int(load_config("anytime").get("app_deadline_ms", 0)),
+                                         help="Start with a local heuristic plan if the LLM takes longer; 0 = always wait")
         force_crisis = st.checkbox("🔥 Force 'Emergency Meeting' Crisis", value=True)
         run_btn = st.button("▶️ Start Agent Simulation", type="primary")
 
     if run_btn:
         # 1. Setup Phase
-        user = UserProfile(procrastination_prob=procrastination, work_speed_multiplier=speed_mult)
-        env = SimulationEnvironment(user)
-        agent = AgenticPlanner()
+        if enable_profiling:
+            profiling.enable(use_cprofile=use_cprofile)
+        try:
+            user = UserProfile(procrastination_prob=procrastination, work_speed_multiplier=speed_mult)
+            env = SimulationEnvironment(user)
+            agent = get_planner(server_url.strip() or None)
         
-        col1, col2 = st.columns([2, 1])
-        with col1:
-            status_box = st.status("🤖 Agent is thinking...", expanded=True)
-            log_container = st.container()
-        with col2:
-            st.subheader("📊 Live Metrics")
-            energy_bar = st.progress(1.0, text="Energy: 100%")
-            time_display = st.empty()
-            task_table = st.empty()
-
-        # 2. Planning Phase
-        status_box.write("Generating Initial Draft...")
-        tasks = generate_synthetic_tasks(num_tasks=num_tasks)
+            col1, col2 = st.columns([2, 1])
+            with col1:
+                status_box = st.status("🤖 Agent is thinking...", expanded=True)
+                log_container = st.container()
+            with col2:
+                st.subheader("📊 Live Metrics")
+                energy_bar = st.progress(1.0, text="Energy: 100%")
+                time_display = st.empty()
+                task_table = st.empty()
+
+            # 2. Planning Phase
+            status_box.write("Generating Initial Draft...")
+            tasks = generate_synthetic_tasks(num_tasks=num_tasks)
+            table = TaskTable.from_tasks(tasks) # Execution state; plans stay lists of Task
         
-        # PASS THE TOGGLES HERE
-        pending_tasks = agent.plan(tasks, user, use_reflexion=use_reflexion, use_memory=use_memory)
+            # PASS THE TOGGLES HERE
+            deadline_ms = latency_budget or None
+            pending_tasks = agent.plan(tasks, user, use_reflexion=use_reflexion, use_memory=use_memory, deadline_ms=deadline_ms)
         
-        if use_reflexion:
-            status_box.write("✅ Plan Approved by Critic Module")
-        else:
-            status_box.write("⚠️ Critic Disabled (Base Model Only)")
+            cache_stats = agent.plan_cache.stats()
+            st.sidebar.caption(f"Plan cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses "
+                               f"({cache_stats['size']} stored plans)")
+
+            if isinstance(pending_tasks, AnytimePlan):
+                status_box.write("⏱️ LLM still thinking: starting with a heuristic plan")
+            elif use_reflexion:
+                status_box.write("✅ Plan Approved by Critic Module")
+            else:
+                status_box.write("⚠️ Critic Disabled (Base Model Only)")
             
-        status_box.update(label="🤖 Simulation Running", state="running")
+            status_box.update(label="🤖 Simulation Running", state="running")
 
-        # Display Initial Table
-        df = pd.DataFrame([vars(t) for t in pending_tasks])
-        task_table.dataframe(df[["description", "estimated_duration_mins", "priority"]], hide_index=True)
+            # Display Initial Table
+            df = table.frame(table.rows(t.id for t in pending_tasks))
+            task_table.dataframe(df[["description", "estimated_duration_mins", "priority"]], hide_index=True)
 
-        # Download Button
-        try:
-            ics_data = create_ics_file(pending_tasks, user.start_hour)
-            st.sidebar.success("📅 Schedule Ready!")
-            st.sidebar.download_button("📥 Download .ics Calendar", ics_data, "agent_schedule.ics", "text/calendar")
-        except Exception as e:
-            st.sidebar.error(f"Calendar export failed: {e}")
-
-        # 3. Execution Loop
-        history_log = []
-        for i, _ in enumerate(range(len(pending_tasks) + 5)):
-            if not pending_tasks: break
-            if env.current_time >= user.end_hour * 60:
-                st.error("⛔ Day Over! Time Limit Reached.")
-                break
+            # Download Button
+            try:
+                ics_data = create_ics_file(pending_tasks, user.start_hour)
+                st.sidebar.success("📅 Schedule Ready!")
+                st.sidebar.download_button("📥 Download .ics Calendar", ics_data, "agent_schedule.ics", "text/calendar")
+            except Exception as e:
+                st.sidebar.error(f"Calendar export failed: {e}")
+
+            # 3. Execution Loop
+            history_log = []
+            for i, _ in enumerate(range(len(pending_tasks) + 5)):
+                # Task boundary: a late LLM plan replaces the heuristic one here
+                if isinstance(pending_tasks, AnytimePlan) and pending_tasks.poll():
+                    df_new = table.frame(table.rows(t.id for t in pending_tasks))
+                    if not df_new.empty:
+                        task_table.dataframe(df_new[["description", "estimated_duration_mins"]], hide_index=True)
+                    st.toast("LLM plan ready: schedule updated!", icon="🧠")
+                if not pending_tasks: break
+                if env.current_time >= user.end_hour * 60:
+                    st.error("⛔ Day Over! Time Limit Reached.")
+                    break
                 
-            current_task = pending_tasks[0]
-            with log_container:
-                with st.chat_message("user", avatar="👤"):
-                    st.write(f"**Working on:** {current_task.description}...")
+                current_task = pending_tasks[0]
+                with log_container:
+                    with st.chat_message("user", avatar="👤"):
+                        st.write(f"**Working on:** {current_task.description}...")
             
-            time.sleep(1) 
-            status, msg = env.simulate_task_execution(current_task)
-            history_log.append(msg)
+                time.sleep(1) 
+                status, msg = env.simulate_row(table, table.row(current_task.id))
+                history_log.append(msg)
             
-            if force_crisis and i == 1:
-                with log_container:
-                    st.toast("🔥 CRISIS EVENT TRIGGERED!", icon="🔥")
-                    st.warning("⚠️ INTERRUPT: 2 Hour Emergency Meeting Added!")
-                env.current_time += 120
-                env.current_energy = max(0, env.current_energy - 30)
-                msg += " + (MAJOR UNEXPECTED DELAY)"
-
-            # Metrics Update
-            energy_pct = max(0, env.current_energy / 100)
-            energy_bar.progress(energy_pct, text=f"Energy: {int(env.current_energy)}%")
-            cur_hour = int(env.current_time // 60)
-            cur_min = int(env.current_time % 60)
-            time_display.metric("Current Time", f"{cur_hour:02d}:{cur_min:02d}")
+                if force_crisis and i == 1:
+                    with log_container:
+                        st.toast("🔥 CRISIS EVENT TRIGGERED!", icon="🔥")
+                        st.warning("⚠️ INTERRUPT: 2 Hour Emergency Meeting Added!")
+                    env.current_time += 120
+                    env.current_energy = max(0, env.current_energy - 30)
+                    msg += " + (MAJOR UNEXPECTED DELAY)"
+
+                # Metrics Update
+                energy_pct = max(0, env.current_energy / 100)
+                energy_bar.progress(energy_pct, text=f"Energy: {int(env.current_energy)}%")
+                cur_hour = int(env.current_time // 60)
+                cur_min = int(env.current_time % 60)
+                time_display.metric("Current Time", f"{cur_hour:02d}:{cur_min:02d}")
             
-            with log_container:
-                if "interruption" in msg or "DELAY" in msg: st.warning(f"Result: {msg}")
-                else: st.success(f"Result: {msg}")
-
-            # --- THE CRITICAL FIX IS HERE ---
-            if status == TaskStatus.COMPLETED:
-                pending_tasks.pop(0)
-            elif status == TaskStatus.FAILED:
-                st.error(f"⛔ Task '{current_task.description}' failed. Stopping execution.")
-                break # Stop the loop so we don't retry forever
-            # --------------------------------
-
-            # Re-planning
-            was_delayed = "interruption" in msg or "tired" in msg or "DELAY" in msg
-            # Only re-plan if we still have tasks pending (and didn't just break)
-            if was_delayed and pending_tasks:
                 with log_container:
-                    with st.chat_message("assistant", avatar="🧠"):
-                        st.write("Wait! I detect a delay. Re-calculating schedule...")
-                try:
-                    pending_tasks = agent.replan(pending_tasks, user, env.current_time, history_log)
-                    df_new = pd.DataFrame([vars(t) for t in pending_tasks])
-                    if not df_new.empty:
-                        task_table.dataframe(df_new[["description", "estimated_duration_mins"]], hide_index=True)
-                        st.toast("Schedule Updated!", icon="🔄")
-                except Exception as e:
-                    st.error(f"Re-planning failed: {e}")
-
-        status_box.update(label="🏁 Simulation Complete", state="complete")
-        if env.current_energy < 20: lesson = "Burnout Warning: High fatigue."
-        elif len(pending_tasks) > 0: lesson = f"Failure: Missed {len(pending_tasks)} tasks."
-        else: lesson = "Success: Perfect Execution."
+                    if "interruption" in msg or "DELAY" in msg: st.warning(f"Result: {msg}")
+                    else: st.success(f"Result: {msg}")
+
+                # --- THE CRITICAL FIX IS HERE ---
+                if status == TaskStatus.COMPLETED:
+                    pending_tasks.pop(0)
+                elif status == TaskStatus.FAILED:
+                    st.error(f"⛔ Task '{current_task.description}' failed. Stopping execution.")
+                    break # Stop the loop so we don't retry forever
+                # --------------------------------
+
+                # Re-planning
+                was_delayed = "interruption" in msg or "tired" in msg or "DELAY" in msg
+                # Only re-plan if we still have tasks pending (and didn't just break)
+                if was_delayed and pending_tasks:
+                    with log_container:
+                        with st.chat_message("assistant", avatar="🧠"):
+                            st.write("Wait! I detect a delay. Re-calculating schedule...")
+                    try:
+                        pending_tasks = agent.replan(pending_tasks, user, env.current_time, history_log, deadline_ms=deadline_ms)
+                        df_new = table.frame(table.rows(t.id for t in pending_tasks))
+                        if not df_new.empty:
+                            task_table.dataframe(df_new[["description", "estimated_duration_mins"]], hide_index=True)
+                            st.toast("Schedule Updated!", icon="🔄")
+                    except Exception as e:
+                        st.error(f"Re-planning failed: {e}")
+
+            status_box.update(label="🏁 Simulation Complete", state="complete")
+            if env.current_energy < 20: lesson = "Burnout Warning: High fatigue."
+            elif len(pending_tasks) > 0: lesson = f"Failure: Missed {len(pending_tasks)} tasks."
+            else: lesson = "Success: Perfect Execution."
         
-        if use_memory:
-            save_reflection(lesson)
-            st.balloons()
-            st.sidebar.success(f"Memory Saved: {lesson}")
-        else:
-            st.sidebar.warning("Memory Disabled: Lesson not saved.")
+            if use_memory:
+                save_reflection(lesson)
+                st.balloons()
+                st.sidebar.success(f"Memory Saved: {lesson}")
+            else:
+                st.sidebar.warning("Memory Disabled: Lesson not saved.")
+        finally:
+            # Also on errors/reruns, so a failed run never leaves the profiler on for the next one
+            prof = profiling.disable()
+
+        # Profiling report
+        if prof is not None:
+            with st.expander("⏱️ Profile: time per phase", expanded=True):
+                st.dataframe(pd.DataFrame(prof.summary()), hide_index=True, use_container_width=True)
+                st.caption("Open the trace in chrome://tracing or ui.perfetto.dev for the nested timeline.")
+            st.sidebar.download_button("📥 Download Chrome Trace", json.dumps(prof.chrome_trace()),
+                                       "agent_trace.json", "application/json")
+            if prof.use_cprofile:
+                prof.dump_cprofile(os.path.join(profiling.DEFAULT_TRACE_DIR, "app_cprofile"))
+                st.sidebar.info(f"cProfile output saved to {profiling.DEFAULT_TRACE_DIR}/app_cprofile")
 
 # =========================================
 # TAB 2: RESEARCH ANALYTICS
@@ -178,36 +223,99 @@ with tab2:
     st.markdown("This dashboard visualizes the performance of the **LLM Agent** compared to a **Greedy Heuristic** (Shortest-Job-First).")
     
     csv_path = "data/evaluation_results.csv"
-    
-    if os.path.exists(csv_path):
-        # Load Data
-        df = pd.read_csv(csv_path)
-        
+
+    # Pre-aggregated summaries: constant-time load no matter how many episodes were logged
+    store = AnalyticsStore()
+
+    if not store.is_empty():
+        summary = store.summary_frame().set_index("agent")
+
         # Display Raw Stats
         st.markdown("### 1. Summary Statistics")
-        summary = df.groupby("agent")[["success_rate", "energy_left", "tasks_completed"]].mean()
-        st.dataframe(summary.style.highlight_max(axis=0), use_container_width=True)
-        
+        st.dataframe(summary[["count", "success_rate", "energy_left", "tasks_completed"]].style.highlight_max(axis=0),
+                     use_container_width=True)
+
         # Display Charts
         st.markdown("### 2. Performance Comparison")
         col_a, col_b = st.columns(2)
-        
+
         with col_a:
             st.markdown("**Success Rate Distribution**")
             fig1, ax1 = plt.subplots()
-            sns.barplot(data=df, x="agent", y="success_rate", hue="agent", palette="viridis", ax=ax1)
+            sns.barplot(x=summary.index, y=summary["success_rate"], hue=summary.index, palette="viridis", ax=ax1)
+            ax1.errorbar(range(len(summary)), summary["success_rate"], yerr=summary["success_rate_std"],
+                         fmt="none", ecolor="black", capsize=4)
             ax1.set_ylim(0, 1.1)
             st.pyplot(fig1)
             st.caption("Higher is better. Measures % of tasks completed by deadline.")
-            
+
         with col_b:
             st.markdown("**Energy Conservation**")
             fig2, ax2 = plt.subplots()
-            sns.boxplot(data=df, x="agent", y="energy_left", hue="agent", palette="magma", ax=ax2)
+            box_stats = store.box_stats("energy_left")
+            boxes = ax2.bxp(box_stats, showfliers=False, patch_artist=True)
+            for patch, color in zip(boxes["boxes"], sns.color_palette("magma", len(box_stats))):
+                patch.set_facecolor(color)
+            ax2.set_ylabel("energy_left")
             st.pyplot(fig2)
             st.caption("Higher is better. Measures remaining user energy (avoiding burnout).")
-            
+
         st.info("💡 **Analysis:** The Agentic Planner typically preserves more energy by dropping low-priority tasks, whereas the Greedy baseline burns out the user by attempting everything.")
-        
+
+        # Drill-down: raw partitions are only read when asked for
+        with st.expander("🔎 Drill down into raw episodes"):
+            agent_choice = st.selectbox("Agent", list(summary.index))
+            if st.button("Load episodes"):
+                st.dataframe(store.load_episodes(agent_choice), use_container_width=True)
+
+    else:
+        st.warning("⚠️ No evaluation data found. Please run `python evaluate_models.py` first to generate the benchmarks!")
+        # Results from before the analytics store existed: import once, on request (never during render)
+        if os.path.exists(csv_path) and st.button(f"📥 Import legacy results from {csv_path}"):
+            store.ingest_csv(csv_path)
+            st.rerun()
+
+# =========================================
+# TAB 3: PARAMETER SWEEP
+# =========================================
+with tab3:
+    st.header("🧪 User Profile Sweep")
+    st.markdown("How each planner behaves across simulated users. Generate cubes with `python run_sweep.py` (grid) or `python run_sweep.py --lhs 40`.")
+
+    cube_paths = list_cubes()
+    if cube_paths:
+        cube_path = st.selectbox("Result cube", cube_paths, format_func=os.path.basename)
+        cube = ResultCube.load(cube_path)
+        axes = cube.axes()
+
+        col_1, col_2, col_3 = st.columns(3)
+        metric = col_1.selectbox("Metric", METRICS)
+        agent_options = cube.agents + (["difference"] if len(cube.agents) == 2 else [])
+        agent_view = col_1.selectbox("Agent", agent_options,
+                                     help=f"'difference' = {cube.agents[-1]} minus {cube.agents[0]}" if len(cube.agents) == 2 else None)
+        x_param = col_2.selectbox("X axis", cube.params, index=0)
+        y_param = col_2.selectbox("Y axis", [p for p in cube.params if p != x_param])
+
+        # Remaining parameters: pin one value or average over all of them
+        fixed = {}
+        for p in cube.params:
+            if p in (x_param, y_param) or len(axes[p]) < 2:
+                continue
+            choice = col_3.selectbox(p, ["average"] + list(axes[p]))
+            if choice != "average":
+                fixed[p] = choice
+        is_lhs = len(cube.frame) > 0 and max(len(axes[x_param]), len(axes[y_param])) > 12
+        bins = col_3.slider("Bins (sampled sweeps)", 3, 12, 6) if is_lhs else None
+
+        grid = cube.heatmap(metric, x_param, y_param, agent=None if agent_view == "difference" else agent_view,
+                            fixed=fixed or None, bins=bins)
+        fig3, ax3 = plt.subplots(figsize=(8, 5))
+        sns.heatmap(grid, annot=True, fmt=".2f", cmap="RdBu" if agent_view == "difference" else "viridis",
+                    center=0 if agent_view == "difference" else None, ax=ax3)
+        ax3.set_title(f"{metric} ({agent_view})")
+        st.pyplot(fig3)
+
+        with st.expander("📋 Cells"):
+            st.dataframe(cube.frame, use_container_width=True)
     else:
-        st.warning("⚠️ No evaluation data found. Please run `python evaluate_models.py` first to generate the benchmarks!")
\ No newline at end of file
+        st.warning("⚠️ No sweep results found. Run `python run_sweep.py` first.")
@@ -1,32 +1,61 @@
-import pandas as pd
+import argparse
+import numpy as np
 import time
 from src.simulation.models import UserProfile, TaskStatus
 from src.simulation.env import SimulationEnvironment
-from src.agent import AgenticPlanner
+from src.simulation.workload import generate_workload
+from src.simulation.task_table import TaskTable
+from src.simulation.trace import TraceWriter, TRACE_DIR
+from src.service import get_planner
+from src.ranker import log_plan
+from src.anytime import FallbackPlan, plan_source
+from src.analytics import AnalyticsStore
+from src.config import load_config
+from src.checkpoint import RunCheckpoint, capture_rng_state, restore_rng_state
+from src.profiling import profiled, span, add_profile_args, start_from_args, finish_from_args
 from generate_dataset import generate_synthetic_tasks
 
-def run_episode(agent_type="greedy", agent=None):
+CHECKPOINT_DIR = "data/checkpoints/evaluate"
+RESULTS_FILE = "data/evaluation_results.csv"
+LOG_PLANS = load_config("ranker").get("log_plans", False)
+
+@profiled("episode")
+def run_episode(agent_type="greedy", agent=None, tasks=None, trace=None, episode_id=0, user=None, use_fast_path=True,
+                log_plans=None):
     """
     Runs a single day. 
     agent_type: 'greedy' (sorts by time) or 'llm' (uses Gemini)
+    tasks: optional pre-drawn task list (a fresh one is generated otherwise)
+    trace: optional TraceWriter that records every task attempt under episode_id
+    user: optional UserProfile (parameter sweeps); defaults to the benchmark user
+    use_fast_path: False makes the LLM agent skip the plan cache and ranker
+    log_plans: append the plan to the ranker training log (default: config.yaml ranker.log_plans)
     """
     # 1. Same initial conditions for fair comparison
-    user = UserProfile(procrastination_prob=0.4, work_speed_multiplier=1.1)
+    if user is None:
+        user = UserProfile(procrastination_prob=0.4, work_speed_multiplier=1.1)
     env = SimulationEnvironment(user)
-    tasks = generate_synthetic_tasks(num_tasks=6)
+    if tasks is None:
+        tasks = generate_synthetic_tasks(num_tasks=6)
     
     # Keep a copy of original tasks for the record
     original_count = len(tasks)
+    table = TaskTable.from_tasks(tasks) # Execution state (the Task objects stay untouched)
+    if trace:
+        trace.begin_episode(episode_id)
     
     # 2. Planning Phase
     if agent_type == "llm":
         try:
-            pending_tasks = agent.plan(tasks, user)
+            pending_tasks = agent.plan(tasks, user, use_fast_path=use_fast_path)
         except:
-            pending_tasks = tasks # Fallback
+            pending_tasks = FallbackPlan(tasks) # Fallback
+        source = plan_source(pending_tasks)
     else:
         # Baseline: Greedy Sort (Shortest Job First)
         pending_tasks = sorted(tasks, key=lambda x: x.estimated_duration_mins)
+        source = "greedy"
+    initial_plan = list(pending_tasks)
 
     # 3. Execution Loop
     completed_count = 0
@@ -38,8 +67,11 @@ def run_episode(agent_type="greedy", agent=None):
             break 
             
         current_task = pending_tasks[0]
-        status, msg = env.simulate_task_execution(current_task)
+        row = table.row(current_task.id)
+        status, msg = env.simulate_row(table, row)
         history_log.append(msg)
+        if trace:
+            trace.record(row, status, env)
         
         if status == TaskStatus.COMPLETED:
             completed_count += 1
@@ -60,40 +92,122 @@ def run_episode(agent_type="greedy", agent=None):
                 except Exception as e:
                     print(f"Replan failed: {e}")
 
-    return {
+    if trace:
+        trace.end_episode()
+
+    result = {
         "agent": agent_type,
         "tasks_completed": completed_count,
         "total_tasks": original_count,
         "success_rate": completed_count / original_count,
         "energy_left": env.current_energy
     }
+    # Training data for the local ranker (train_ranker.py)
+    if LOG_PLANS if log_plans is None else log_plans:
+        log_plan(initial_plan, user, result, source=source)
+    return result
 
-def main():
+def main(episodes_per_agent=None, seed=None, checkpoint_dir=CHECKPOINT_DIR, resume=False, server_url=None, trace_dir=None,
+         llm_only=False):
+    """
+    Greedy vs. LLM benchmark. Each finished episode is checkpointed immediately,
+    so `resume=True` never repeats an episode (or its paid LLM calls).
+    server_url: plan through a running planning_server.py instead of an in-process agent.
+    trace_dir: also write per-task events to a binary trace (episode id = checkpoint shard id).
+    episodes_per_agent defaults to 5 on a fresh run; on resume the checkpoint's value is kept.
+    llm_only: the LLM arm always calls the LLM (no plan cache or ranker), so it measures the LLM alone
+    and every logged plan is a real LLM plan for train_ranker.py.
+    """
     print("Starting Evaluation: LLM Agent vs. Greedy Baseline")
-    results = []
-    agent = AgenticPlanner() # Initialize once
-    
-    # Run 5 rounds of Greedy
-    print("Running Baseline (Greedy)...")
-    for i in range(5):
-        res = run_episode("greedy")
-        results.append(res)
-        print(f"  Greedy Episode {i+1}: {res['success_rate']*100:.0f}% success")
-        
-    # Run 5 rounds of LLM
-    print("\nRunning AI Agent (LLM)...")
-    for i in range(5):
-        print(f"  LLM Episode {i+1}...")
-        res = run_episode("llm", agent)
-        results.append(res)
-        time.sleep(2) # Safety pause for API limits
-        
+    ckpt = RunCheckpoint(checkpoint_dir)
+
+    # 1. Fresh run or resume
+    if resume and ckpt.exists():
+        config = ckpt.load()
+        print(f"Resuming evaluation from {checkpoint_dir}: {len(ckpt.completed_shards)} episodes already done.")
+        ckpt.warn_overrides({"episodes_per_agent": episodes_per_agent, "seed": seed})
+    else:
+        if resume:
+            print(f"No checkpoint found in {checkpoint_dir}. Starting a fresh run.")
+        if seed is None:
+            seed = int(np.random.SeedSequence().entropy % 2**32)
+        config = {"episodes_per_agent": episodes_per_agent or 5, "seed": seed}
+        ckpt.start(config)
+
+    # Greedy episode i and LLM episode i face the same task list.
+    n = config["episodes_per_agent"]
+    batch = generate_workload(n, num_tasks=6, rng=np.random.default_rng(config["seed"]))
+    schedule = [("greedy", i) for i in range(n)] + [("llm", i) for i in range(n)]
+    # Seed first, then fast-forward to the last finished episode if there is one.
+    np.random.seed(config["seed"])
+    if ckpt.rng_state:
+        restore_rng_state(ckpt.rng_state)
+
+    done = set(ckpt.completed_shards)
+    trace = None
+    if trace_dir:
+        trace = TraceWriter(trace_dir, resume_at=ckpt.manifest.get("trace") if resume else None)
+    agent = None
+    if any(agent_type == "llm" for k, (agent_type, _) in enumerate(schedule) if k not in done):
+        agent = get_planner(server_url) # Initialize once
+
+    for k, (agent_type, i) in enumerate(schedule):
+        if k in done:
+            continue
+
+        if agent_type == "greedy":
+            if i == 0:
+                print("Running Baseline (Greedy)...")
+            res = run_episode("greedy", tasks=batch.materialize(i), trace=trace, episode_id=k)
+            print(f"  Greedy Episode {i+1}: {res['success_rate']*100:.0f}% success")
+        else:
+            if i == 0:
+                print("\nRunning AI Agent (LLM)...")
+            print(f"  LLM Episode {i+1}...")
+            res = run_episode("llm", agent, tasks=batch.materialize(i), trace=trace, episode_id=k,
+                              use_fast_path=not llm_only)
+
+        ckpt.save_shard(k, [res], rng_state=capture_rng_state(),
+                        extra={"trace": trace.position()} if trace else None)
+        if agent_type == "llm":
+            time.sleep(2) # Safety pause for API limits
+
+    if trace:
+        trace.close()
+
     # Save Results
-    df = pd.DataFrame(results)
+    df = ckpt.load_records()
     print("\n--- Final Results (Average) ---")
     print(df.groupby("agent")[["success_rate", "energy_left"]].mean())
-    df.to_csv("data/evaluation_results.csv", index=False)
-    print("\nDetailed results saved to 'data/evaluation_results.csv'")
+    with span("csv_write"):
+        df.to_csv(RESULTS_FILE, index=False)
+    print(f"\nDetailed results saved to '{RESULTS_FILE}'")
+
+    # Incremental dashboard summaries (Research Analytics tab / plot_results.py).
+    # Only shards not appended by an earlier (interrupted or repeated) invocation of this run.
+    appended = set(ckpt.manifest.get("analytics_shards", []))
+    new_shards = [k for k in ckpt.completed_shards if k not in appended]
+    if new_shards:
+        AnalyticsStore().append(ckpt.load_records(new_shards))
+        ckpt.update(analytics_shards=sorted(appended.union(new_shards)))
+    if agent is not None:
+        agent.plan_cache.report()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Benchmark the LLM agent against the greedy baseline.")
+    parser.add_argument("--episodes", type=int, default=None, help="Episodes per agent (default: 5)")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--checkpoint-dir", default=CHECKPOINT_DIR)
+    parser.add_argument("--resume", action="store_true", help="Continue an interrupted run from its checkpoint")
+    parser.add_argument("--server", default=None, help="Planning service URL, e.g. http://127.0.0.1:8765")
+    parser.add_argument("--trace", nargs="?", const=f"{TRACE_DIR}/evaluate", default=None, metavar="DIR",
+                        help="Also write a memory-mappable binary per-task trace")
+    parser.add_argument("--llm-only", action="store_true",
+                        help="LLM arm skips the plan cache and local ranker (benchmark the LLM alone / collect training plans)")
+    add_profile_args(parser)
+    args = parser.parse_args()
+
+    start_from_args(args)
+    main(episodes_per_agent=args.episodes, seed=args.seed, checkpoint_dir=args.checkpoint_dir, resume=args.resume,
+         server_url=args.server, trace_dir=args.trace, llm_only=args.llm_only)
+    finish_from_args(args, "evaluate_models")
@@ -1,70 +1,149 @@
-import pandas as pd
-import random
-import uuid
+import argparse
+import numpy as np
 from tqdm import tqdm
 from src.simulation.models import Task, UserProfile, TaskStatus
 from src.simulation.env import SimulationEnvironment
+from src.simulation.workload import generate_workload
+from src.simulation.task_table import TaskTable
+from src.simulation.trace import TraceWriter, TRACE_DIR
+from src.ranker import log_plan
+from src.checkpoint import RunCheckpoint, capture_rng_state, restore_rng_state
+from src.profiling import span, add_profile_args, start_from_args, finish_from_args
 
-def generate_synthetic_tasks(num_tasks=5) -> list[Task]:
-    """Generates a random list of tasks with loose dependencies."""
-    tasks = []
-    # Mix of academic and personal tasks
-    verbs = ["Read", "Write", "Code", "Review", "Email", "Debug"]
-    nouns = ["Paper", "Report", "Module", "Notes", "Professor", "Script"]
-    
-    for i in range(num_tasks):
-        t_id = str(uuid.uuid4())[:8]
-        desc = f"{random.choice(verbs)} {random.choice(nouns)} {i+1}"
-        est = random.choice([30, 45, 60, 90, 120])
-        
-        tasks.append(Task(
-            id=t_id,
-            description=desc,
-            estimated_duration_mins=est,
-            deadline_day=1
-        ))
-    return tasks
-
-def run_batch(num_episodes=100000):
-    """Runs the baseline (Greedy Scheduler) simulation."""
-    data_records = []
+CHECKPOINT_DIR = "data/checkpoints/run_batch"
+OUTPUT_FILE = "data/simulation_v1.csv"
 
+def generate_synthetic_tasks(num_tasks=5, scenario=None) -> list[Task]:
+    """Generates a random list of tasks (one episode of the configured workload scenario)."""
+    batch = generate_workload(1, scenario=scenario, num_tasks=num_tasks)
+    return batch.materialize(0)
+
+def run_batch(num_episodes=None, scenario=None, seed=None, shard_size=None,
+              checkpoint_dir=CHECKPOINT_DIR, resume=False, log_plans=False, trace_dir=None):
+    """
+    Runs the baseline (Greedy Scheduler) simulation.
+    Every `shard_size` episodes the finished records and RNG state are checkpointed,
+    so `resume=True` continues an interrupted run without redoing finished shards.
+    num_episodes / shard_size default to 100000 / 5000 on a fresh run; on resume the
+    checkpoint's values are kept (a warning names any that were overridden).
+    log_plans=True also appends each episode's plan and outcome to the ranker training log.
+    trace_dir: also write per-task events to a binary trace (see src/simulation/trace.py).
+    """
+    ckpt = RunCheckpoint(checkpoint_dir)
+
+    # 1. Fresh run or resume
+    if resume and ckpt.exists():
+        config = ckpt.load()
+        print(f"Resuming run from {checkpoint_dir}: {len(ckpt.completed_shards)} shards already done.")
+        ckpt.warn_overrides({"num_episodes": num_episodes, "scenario": scenario, "seed": seed,
+                             "shard_size": shard_size})
+    else:
+        if resume:
+            print(f"No checkpoint found in {checkpoint_dir}. Starting a fresh run.")
+        if seed is None:
+            seed = int(np.random.SeedSequence().entropy % 2**32)
+        config = {"num_episodes": num_episodes or 100000, "scenario": scenario, "seed": seed,
+                  "shard_size": shard_size or 5000}
+        ckpt.start(config)
+
+    num_episodes = config["num_episodes"]
+    shard_size = config["shard_size"]
+
+    # 2. Draw every episode's tasks up front as columns (no per-task objects yet).
+    # The batch is a pure function of the seed, so a resumed run sees identical episodes.
     print(f"Generating {num_episodes} episodes...")
-    for _ in tqdm(range(num_episodes)):
-        # 1. Setup Episode
-        user = UserProfile(work_speed_multiplier=random.uniform(0.8, 1.2)) # Randomize user type
-        env = SimulationEnvironment(user)
-        tasks = generate_synthetic_tasks(num_tasks=random.randint(4, 8))
-        
-        # 2. Simple Heuristic Planning (Baseline): Sort by Shortest Job First
-        # NOTE: Later, your LLM will replace this sorting logic.
-        tasks.sort(key=lambda x: x.estimated_duration_mins)
-        
-        # 3. Run Execution Loop
-        episode_log = []
-        failures = 0
-        
-        for task in tasks:
-            status, msg = env.simulate_task_execution(task)
-            episode_log.append(msg)
-            if status == TaskStatus.FAILED:
-                failures += 1
-                
-        # 4. Save Data
-        data_records.append({
-            "user_speed": user.work_speed_multiplier,
-            "total_tasks": len(tasks),
-            "failed_tasks": failures,
-            "success_rate": 1.0 - (failures/len(tasks)),
-            "log_trace": " | ".join(episode_log)
-        })
+    with span("generate_workload"):
+        batch = generate_workload(num_episodes, scenario=config["scenario"],
+                                  rng=np.random.default_rng(config["seed"]))
+    # Seed first, then fast-forward to the last finished shard if there is one; a run interrupted
+    # before its first shard must replay the same draws as an uninterrupted one.
+    np.random.seed(config["seed"])
+    if ckpt.rng_state:
+        restore_rng_state(ckpt.rng_state)
+
+    trace = None
+    if trace_dir:
+        trace = TraceWriter(trace_dir, resume_at=ckpt.manifest.get("trace") if resume else None)
+
+    num_shards = (num_episodes + shard_size - 1) // shard_size
+    done = set(ckpt.completed_shards)
+
+    with tqdm(total=num_episodes, initial=min(len(done) * shard_size, num_episodes)) as pbar:
+        for shard_id in range(num_shards):
+            if shard_id in done:
+                continue
+
+            data_records = []
+            for e in range(shard_id * shard_size, min((shard_id + 1) * shard_size, num_episodes)):
+                # 3. Setup Episode
+                user = UserProfile(work_speed_multiplier=float(batch.user_speed[e])) # Randomize user type
+                env = SimulationEnvironment(user)
+                table = TaskTable.from_batch(batch, e) # Execution state only, no Task objects
+                first_row = batch.episode_slice(e).start
+
+                # 4. Simple Heuristic Planning (Baseline): Sort by Shortest Job First
+                # NOTE: Later, your LLM will replace this sorting logic.
+                order = np.argsort(table.estimated_duration_mins, kind="stable").tolist()
+
+                # 5. Run Execution Loop
+                episode_log = []
+                failures = 0
+                if trace:
+                    trace.begin_episode(e)
+
+                for row in order:
+                    status, msg = env.simulate_row(table, row)
+                    episode_log.append(msg)
+                    if trace:
+                        trace.record(first_row + row, status, env)
+                    if status == TaskStatus.FAILED:
+                        failures += 1
+                if trace:
+                    trace.end_episode()
+
+                # 6. Save Data
+                data_records.append({
+                    "user_speed": user.work_speed_multiplier,
+                    "total_tasks": len(table),
+                    "failed_tasks": failures,
+                    "success_rate": 1.0 - (failures/len(table)),
+                    "log_trace": " | ".join(episode_log)
+                })
+                if log_plans:
+                    log_plan(table.to_tasks(order), user, data_records[-1], source="greedy")
+                pbar.update(1)
+
+            # 7. Checkpoint the shard together with the RNG state needed to continue after it
+            ckpt.save_shard(shard_id, data_records, rng_state=capture_rng_state(),
+                            extra={"trace": trace.position()} if trace else None)
+
+    if trace:
+        trace.close()
+        print(f"Binary trace saved to {trace_dir}")
 
     # Save to CSV
-    df = pd.DataFrame(data_records)
-    df.to_csv("data/simulation_v1.csv", index=False)
-    print("Dataset saved to data/simulation_v1.csv")
+    df = ckpt.load_records()
+    with span("csv_write"):
+        df.to_csv(OUTPUT_FILE, index=False)
+    print(f"Dataset saved to {OUTPUT_FILE}")
     print("\n--- Sample Trace ---")
     print(df.iloc[0]["log_trace"])
 
 if __name__ == "__main__":
-    run_batch()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Generate the greedy-baseline simulation dataset.")
+    parser.add_argument("--episodes", type=int, default=None, help="Episodes to generate (default: 100000)")
+    parser.add_argument("--scenario", default=None, help="Workload scenario from config.yaml")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--shard-size", type=int, default=None, help="Episodes per checkpoint (default: 5000)")
+    parser.add_argument("--checkpoint-dir", default=CHECKPOINT_DIR)
+    parser.add_argument("--resume", action="store_true", help="Continue an interrupted run from its checkpoint")
+    parser.add_argument("--trace", nargs="?", const=f"{TRACE_DIR}/run_batch", default=None, metavar="DIR",
+                        help="Also write a memory-mappable binary per-task trace")
+    parser.add_argument("--log-plans", action="store_true", help="Append plans + outcomes to the ranker training log")
+    add_profile_args(parser)
+    args = parser.parse_args()
+
+    start_from_args(args)
+    run_batch(num_episodes=args.episodes, scenario=args.scenario, seed=args.seed, shard_size=args.shard_size,
+              checkpoint_dir=args.checkpoint_dir, resume=args.resume, log_plans=args.log_plans, trace_dir=args.trace)
+    finish_from_args(args, "generate_dataset")
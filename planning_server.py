@@ -0,0 +1,21 @@
+import argparse
+from src.service import serve
+
+def main(host=None, port=None):
+    """Runs the long-lived planning service until Ctrl-C."""
+    server, service = serve(host, port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n[Planning Service]: Shutting down.")
+        print(service.stats())
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve plan/replan/critique over local HTTP with warm LLM clients.")
+    parser.add_argument("--host", default=None, help="Default: planning_service.host in config.yaml")
+    parser.add_argument("--port", type=int, default=None, help="Default: planning_service.port in config.yaml")
+    args = parser.parse_args()
+
+    main(args.host, args.port)
@@ -1,17 +1,17 @@
-import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
+from src.analytics import AnalyticsStore
 
 def plot_comparison():
-    # Load data
-    try:
-        df = pd.read_csv("data/evaluation_results.csv")
-    except:
+    # Load pre-aggregated summaries (no raw episode scan)
+    store = AnalyticsStore()
+    store.ingest_csv("data/evaluation_results.csv")
+    if store.is_empty():
         print("Error: Run evaluate_models.py first!")
         return
 
     # Group data
-    summary = df.groupby("agent")[["success_rate", "energy_left"]].mean().reset_index()
+    summary = store.summary_frame()
     
     # Setup Plot
     fig, axes = plt.subplots(1, 2, figsize=(12, 5))
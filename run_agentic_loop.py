@@ -1,22 +1,33 @@
+import argparse
 import time
 from src.simulation.models import UserProfile, TaskStatus
 from src.simulation.env import SimulationEnvironment
-from src.agent import AgenticPlanner
+from src.simulation.task_table import TaskTable
+from src.service import get_planner
 from src.memory import save_reflection # <--- NEW
+from src.ranker import log_plan
+from src.config import load_config
 from generate_dataset import generate_synthetic_tasks
+from src.anytime import plan_source
+from src.profiling import add_profile_args, start_from_args, finish_from_args
 
-def main():
+def main(server_url=None, stream=False, deadline_ms=None):
     # 1. Setup
     user = UserProfile(procrastination_prob=0.3)
     env = SimulationEnvironment(user)
-    agent = AgenticPlanner()
+    agent = get_planner(server_url)
     
     # 2. Initial State
     tasks = generate_synthetic_tasks(num_tasks=6)
+    table = TaskTable.from_tasks(tasks)
     print(f"Goal: Complete {len(tasks)} tasks by {user.end_hour}:00.")
     
     # 3. Initial Plan (This triggers the Draft -> Critic -> Refine loop)
-    pending_tasks = agent.plan(tasks, user)
+    # With streaming, execution starts as soon as the first task ID has been decoded
+    # With a deadline, a heuristic plan starts right away and the LLM plan is swapped in when ready
+    pending_tasks = agent.plan_stream(tasks, user) if stream else agent.plan(tasks, user, deadline_ms=deadline_ms)
+    plan_record = pending_tasks
+    initial_plan = None if stream else list(pending_tasks)
     history_log = []
     
     # 4. The Execution Loop
@@ -28,7 +39,7 @@ def main():
         current_task = pending_tasks[0]
         
         print(f"\n>>> Attempting: {current_task.description}...")
-        status, msg = env.simulate_task_execution(current_task)
+        status, msg = env.simulate_row(table, table.row(current_task.id))
         history_log.append(msg)
         print(f"    Result: {msg}")
         
@@ -47,12 +58,16 @@ def main():
         was_delayed = "interruption" in msg or "tired" in msg or "DELAY" in msg
         if was_delayed and pending_tasks:
             print("\n*** DETECTED DELAY: Triggering Agent Re-Plan ***")
-            pending_tasks = agent.replan(
-                pending_tasks, 
-                user, 
-                env.current_time, 
-                history_log
-            )
+            if stream:
+                pending_tasks = agent.replan_stream(list(pending_tasks), user, env.current_time, history_log)
+            else:
+                pending_tasks = agent.replan(
+                    pending_tasks, 
+                    user, 
+                    env.current_time, 
+                    history_log,
+                    deadline_ms=deadline_ms
+                )
 
     # 6. SAVE MEMORY (The Learning Step)
     print("\n--- Day Summary ---")
@@ -68,5 +83,22 @@ def main():
     save_reflection(lesson)
     print(f"[Memory Saved]: {lesson}")
 
+    if load_config("ranker").get("log_plans", False):
+        outcome = {"success_rate": 1 - len(pending_tasks) / len(tasks), "energy_left": env.current_energy}
+        if initial_plan is None:
+            initial_plan = plan_record.ordered()
+        # Cache/ranker-served and anytime plans are tagged so train_ranker.py can leave them out
+        log_plan(initial_plan, user, outcome, source=plan_source(plan_record))
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Run one day of the Draft -> Critic -> Execute -> Re-plan loop.")
+    parser.add_argument("--server", default=None, help="Planning service URL, e.g. http://127.0.0.1:8765")
+    parser.add_argument("--stream", action="store_true", help="Stream LLM plans and start executing before the response completes")
+    parser.add_argument("--deadline-ms", type=float, default=None,
+                        help="Latency budget per plan/replan; start with a heuristic plan if the LLM is slower")
+    add_profile_args(parser)
+    args = parser.parse_args()
+
+    start_from_args(args)
+    main(server_url=args.server, stream=args.stream, deadline_ms=args.deadline_ms)
+    finish_from_args(args, "run_agentic_loop")
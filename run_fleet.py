@@ -0,0 +1,37 @@
+import argparse
+import os
+from src.config import load_config
+from src.fleet import load_curve, FLEET_DIR, POLICIES
+from src.profiling import add_profile_args, start_from_args, finish_from_args
+
+def main(tenant_counts=None, policies=POLICIES, capacity=None, rpm=None, seed=None):
+    """
+    Capacity planning: simulates growing fleets of users sharing one LLM quota and reports
+    latency, queueing delay and completion rate per load level and scheduling policy.
+    """
+    tenant_counts = tenant_counts or load_config("fleet").get("tenant_counts", [50, 100, 200, 400])
+    curve, tenants = load_curve(tenant_counts, policies, capacity=capacity, rpm=rpm, seed=seed)
+
+    os.makedirs(FLEET_DIR, exist_ok=True)
+    curve.to_csv(os.path.join(FLEET_DIR, "load_curve.csv"), index=False)
+    tenants.to_csv(os.path.join(FLEET_DIR, "tenants.csv"), index=False)
+
+    print("\n--- Load Curve ---")
+    columns = ["num_tenants", "policy", "completion_rate", "latency_p50_s", "latency_p95_s",
+               "queue_delay_p95_s", "replan_queue_delay_p95_s", "tenant_queue_delay_worst_s"]
+    print(curve[[c for c in columns if c in curve.columns]].to_string(index=False, float_format="%.2f"))
+    print(f"\nResults saved to '{FLEET_DIR}/load_curve.csv' and '{FLEET_DIR}/tenants.csv'")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulate many users sharing one LLM quota.")
+    parser.add_argument("--tenants", type=int, nargs="+", default=None, help="Fleet sizes (default: fleet.tenant_counts)")
+    parser.add_argument("--policy", nargs="+", choices=POLICIES, default=list(POLICIES))
+    parser.add_argument("--capacity", type=int, default=None, help="Concurrent LLM calls")
+    parser.add_argument("--rpm", type=float, default=None, help="LLM calls per minute")
+    parser.add_argument("--seed", type=int, default=None)
+    add_profile_args(parser)
+    args = parser.parse_args()
+
+    start_from_args(args)
+    main(tenant_counts=args.tenants, policies=args.policy, capacity=args.capacity, rpm=args.rpm, seed=args.seed)
+    finish_from_args(args, "run_fleet")
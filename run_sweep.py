@@ -0,0 +1,45 @@
+import argparse
+import os
+import numpy as np
+from src.config import load_config
+from src.sweep import SweepEngine, grid_points, latin_hypercube, SWEEP_DIR
+from src.profiling import add_profile_args, start_from_args, finish_from_args
+
+def main(lhs=None, agents=None, episodes=None, seed=None, server_url=None, output=None):
+    """
+    Sweeps UserProfile parameters (config.yaml `sweep.grid`, or `--lhs N` points from `sweep.lhs`)
+    and saves the result cube to data/sweeps/<output>.csv for the app's Parameter Sweep tab.
+    """
+    cfg = load_config("sweep")
+    engine = SweepEngine.from_config(agents=agents, episodes=episodes, seed=seed, server_url=server_url)
+
+    if lhs:
+        points = latin_hypercube(cfg.get("lhs", {}), lhs, rng=np.random.default_rng(engine.seed))
+        output = output or f"lhs_{lhs}"
+    else:
+        points = grid_points(cfg.get("grid", {}))
+        output = output or "grid"
+    print(f"Sweeping {len(points)} cells x {len(engine.agents)} agents x {engine.episodes} episodes")
+
+    cube = engine.run(points)
+    path = os.path.join(SWEEP_DIR, f"{output}.csv")
+    cube.save(path)
+    print(f"Result cube saved to '{path}'")
+    print(cube.frame.groupby("agent")[["success_rate", "energy_left"]].mean())
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run planners across a grid of simulated user profiles.")
+    parser.add_argument("--lhs", type=int, default=None, metavar="N",
+                        help="Latin-hypercube sample of N cells from sweep.lhs instead of the full grid")
+    parser.add_argument("--agents", nargs="+", choices=["greedy", "llm"], default=None)
+    parser.add_argument("--episodes", type=int, default=None, help="Episodes per cell")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--server", default=None, help="Planning service URL, e.g. http://127.0.0.1:8765")
+    parser.add_argument("--output", default=None, help="Cube name under data/sweeps/ (default: grid / lhs_N)")
+    add_profile_args(parser)
+    args = parser.parse_args()
+
+    start_from_args(args)
+    main(lhs=args.lhs, agents=args.agents, episodes=args.episodes, seed=args.seed, server_url=args.server,
+         output=args.output)
+    finish_from_args(args, "run_sweep")
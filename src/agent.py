@@ -1,14 +1,35 @@
-from typing import List
+import json
+import time
+from typing import List, Iterator, Optional
 from src.simulation.models import Task, UserProfile
 from src.llm_client import LLMClient
 from src.critic import PlanCritic
 from src.memory import get_past_mistakes
+from src.profiling import profiled, span
+from src.plan_cache import PlanCache
+from src.ranker import load_ranker_from_config
+from src.streaming import IncrementalPlanParser, LazyPlan
+from src.anytime import AnytimeExecutor, FallbackPlan, SourcedPlan, heuristic_plan, run_with_deadline
+from src.config import load_config
+
+# Streaming wants the IDs before the prose so the first task can start early.
+STREAM_ORDER_HINT = '\n        Emit "ordered_task_ids" BEFORE "rationale" in the JSON object.'
 
 class AgenticPlanner:
     def __init__(self):
         self.llm = LLMClient()
-        self.critic = PlanCritic()
+        reflexion_cfg = load_config("reflexion")
+        self.critic = PlanCritic(memo_size=reflexion_cfg.get("critique_memo_size", 1024))
+        self.plan_cache = PlanCache.from_config()
+        self.ranker, ranker_cfg = load_ranker_from_config()
+        self.ranker_threshold = ranker_cfg.get("confidence_threshold", 0.8)
+        # Background LLM work for deadline_ms (anytime) calls
+        self._background = AnytimeExecutor(max_workers=load_config("anytime").get("background_workers", 2))
+        self.max_rounds = reflexion_cfg.get("max_rounds", 3)
+        self.max_llm_calls = reflexion_cfg.get("max_llm_calls", 7)
+        self.time_budget_s = reflexion_cfg.get("time_budget_s", 60)
 
+    @profiled("build_prompt")
     def construct_prompt(self, tasks: List[Task], user: UserProfile, past_failures: str, feedback_context: str = "") -> str:
         """
         Builds the prompt. Now accepts 'past_failures' as an argument so we can turn it off.
@@ -49,9 +70,87 @@ class AgenticPlanner:
             
         return base_prompt
 
-    def plan(self, tasks: List[Task], user: UserProfile, use_reflexion: bool = True, use_memory: bool = True) -> List[Task]:
+    @profiled("plan")
+    def plan(self, tasks: List[Task], user: UserProfile, use_reflexion: bool = True, use_memory: bool = True,
+             deadline_ms: Optional[float] = None, use_fast_path: bool = True) -> List[Task]:
         """
         Main planning loop with Ablation Toggles.
+        Equivalent task sets (same durations/priorities/deadlines/dependencies, similar user)
+        are served from the plan cache, and confident local-ranker plans skip the LLM entirely.
+        deadline_ms: latency budget. If the LLM pipeline is not done in time, an AnytimePlan
+        (heuristic order now, LLM order swapped in at a later task boundary) is returned.
+        use_fast_path=False always asks the LLM (no cache lookup, no ranker), e.g. to benchmark it alone.
+        The result is a SourcedPlan whose .source names the path that produced it.
+        """
+        cache_flags = (use_reflexion, use_memory)
+        fast = self._fast_path(tasks, user, cache_flags) if use_fast_path else None
+        if fast is not None:
+            return fast
+
+        def compute():
+            ordered_tasks = self._plan_uncached(tasks, user, use_reflexion, use_memory, self.plan_from_prompt)
+            if isinstance(ordered_tasks, FallbackPlan):
+                return ordered_tasks
+            self.plan_cache.store(tasks, user, ordered_tasks, cache_flags)
+            return SourcedPlan(ordered_tasks, "llm")
+
+        if deadline_ms is None:
+            return compute()
+        return run_with_deadline(compute, lambda: heuristic_plan(tasks, user, self.ranker), deadline_ms, self._background)
+
+    @profiled("plan")
+    def plan_stream(self, tasks: List[Task], user: UserProfile, use_reflexion: bool = True, use_memory: bool = True,
+                    use_fast_path: bool = True) -> LazyPlan:
+        """
+        Same pipeline as plan(), but the final LLM call (the refine step, or the draft when
+        Reflexion is off) is streamed: the returned LazyPlan yields each task as soon as its ID
+        has been decoded, so execution can begin before the response is complete.
+        Reflexion is limited to one round here: in later rounds a refine is only final once the
+        critic has reviewed the complete plan, so nothing could start before it finished anyway.
+        """
+        cache_flags = (use_reflexion, use_memory)
+        fast = self._fast_path(tasks, user, cache_flags) if use_fast_path else None
+        if fast is not None:
+            return LazyPlan(iter(fast), plan_source=fast.source)
+
+        def store(ordered: List[Task]):
+            self.plan_cache.store(tasks, user, ordered, cache_flags)
+
+        result = self._plan_uncached(tasks, user, use_reflexion, use_memory,
+                                     lambda p, t, fallback=None: LazyPlan(self.stream_plan_from_prompt(p, t, fallback),
+                                                                          on_complete=store),
+                                     max_rounds=1)
+        if isinstance(result, LazyPlan):
+            return result
+        if isinstance(result, FallbackPlan):
+            return LazyPlan(iter(result), plan_source=result.source)
+        store(result)
+        return LazyPlan(iter(result))
+
+    def _fast_path(self, tasks: List[Task], user: UserProfile, cache_flags: tuple):
+        """Plan cache, then local ranker. Returns None when the LLM is needed."""
+        # 0. Plan Cache
+        cached = self.plan_cache.lookup(tasks, user, cache_flags)
+        if cached is not None:
+            print("[Plan Cache]: Equivalent task set seen before. Reusing stored ordering.")
+            return SourcedPlan(cached, "cache")
+
+        # 0b. Local Ranker fast path (escalate to the LLM only when unsure)
+        if self.ranker is not None:
+            with span("ranker"):
+                ranked, confidence = self.ranker.rank(tasks, user)
+            if confidence >= self.ranker_threshold:
+                print(f"[Ranker]: Confident local plan ({confidence:.2f}). Skipping LLM.")
+                return SourcedPlan(ranked, "ranker")
+            print(f"[Ranker]: Low confidence ({confidence:.2f}). Escalating to LLM.")
+        return None
+
+    def _plan_uncached(self, tasks: List[Task], user: UserProfile, use_reflexion: bool, use_memory: bool, final_step,
+                       max_rounds: Optional[int] = None):
+        """
+        Draft -> (Critique -> Refine)*. `final_step(prompt, tasks, fallback=None)` runs the last LLM call
+        (blocking or streamed); if it fails, it returns `fallback` (the plan being refined) instead.
+        max_rounds overrides the configured reflexion rounds.
         """
         # 1. Handle Memory Toggle
         if use_memory:
@@ -62,32 +161,94 @@ class AgenticPlanner:
         # 2. Draft
         print("\n[Agent]: Drafting initial plan...")
         prompt = self.construct_prompt(tasks, user, past_failures)
-        draft_tasks = self.plan_from_prompt(prompt, tasks)
-        
-        # 3. Handle Reflexion Toggle
+
+        # 3. Handle Reflexion Toggle (the draft is the final plan)
         if not use_reflexion:
             print("[System]: Reflexion (Critic) is DISABLED. Skipping validation.")
-            return draft_tasks
+            return final_step(prompt, tasks)
+        start = time.perf_counter()
+        draft_tasks = self.plan_from_prompt(prompt, tasks)
 
         # 4. Critique Loop (Only runs if Reflexion is ON)
-        print("[Critic]: Reviewing plan...")
-        feedback = self.critic.critique_plan(draft_tasks, user)
-        
-        if feedback == "APPROVED":
-            print(f"[Critic]: Plan looks solid. Approving.")
-            return draft_tasks
-        else:
+        return self._reflexion_loop(tasks, user, past_failures, draft_tasks, final_step, start, max_rounds)
+
+    def _reflexion_loop(self, tasks: List[Task], user: UserProfile, past_failures: str, current: List[Task],
+                        final_step, start: float, max_rounds: Optional[int] = None):
+        """
+        Up to max_rounds of critique -> refine, within max_llm_calls (the draft counts) and time_budget_s.
+        Stops early when the critic approves or a refine returns an ordering already seen.
+        Orderings critiqued earlier in the session reuse their feedback (no LLM call).
+        """
+        max_rounds = max_rounds or self.max_rounds
+        calls, round_no = 1, 0
+        seen = {tuple(t.id for t in current)}
+        for round_no in range(1, max_rounds + 1):
+            if time.perf_counter() - start > self.time_budget_s:
+                print("[Reflexion]: Time budget exhausted. Keeping current plan.")
+                break
+
+            # A critique is only worth paying for if a refine still fits in the budget
+            cached = self.critic.has_critique(current, user)
+            if calls + (1 if cached else 2) > self.max_llm_calls:
+                print("[Reflexion]: LLM call budget exhausted. Keeping current plan.")
+                break
+
+            print(f"[Critic]: Reviewing plan (round {round_no}/{max_rounds})...")
+            if cached:
+                print("[Critic]: Ordering already critiqued this session. Reusing feedback.")
+            else:
+                calls += 1
+            feedback = self.critic.critique_plan(current, user)
+
+            if feedback == "APPROVED":
+                print(f"[Critic]: Plan looks solid. Approving.")
+                break
+
             print(f"\n[Critic Detected Flaw]: {feedback}")
             print("[Agent]: Refining plan based on feedback...")
-            
-            # Refine
             refined_prompt = self.construct_prompt(tasks, user, past_failures, feedback_context=feedback)
-            return self.plan_from_prompt(refined_prompt, tasks)
+            calls += 1
+
+            # No critique can follow the last refine, so it is the final plan (or `current` if it fails)
+            if round_no == max_rounds or calls + 2 > self.max_llm_calls:
+                print(f"[Reflexion]: {round_no} round(s), {calls} LLM calls.")
+                return final_step(refined_prompt, tasks, current)
 
-    def replan(self, remaining_tasks: List[Task], user: UserProfile, current_time: int, history_log: List[str]) -> List[Task]:
+            refined = self.plan_from_prompt(refined_prompt, tasks)
+            if isinstance(refined, FallbackPlan):
+                print("[Reflexion]: Refine call failed. Keeping current plan.")
+                break
+            ordering = tuple(t.id for t in refined)
+            current = refined
+            if ordering in seen:
+                print("[Reflexion]: Ordering unchanged by refinement. Converged.")
+                break
+            seen.add(ordering)
+
+        print(f"[Reflexion]: {round_no} round(s), {calls} LLM calls.")
+        return current
+
+    @profiled("replan")
+    def replan(self, remaining_tasks: List[Task], user: UserProfile, current_time: int, history_log: List[str],
+               deadline_ms: Optional[float] = None) -> List[Task]:
         """
         Called when the schedule breaks during execution.
+        deadline_ms: latency budget, as in plan().
         """
+        remaining_tasks = list(remaining_tasks)
+        prompt = self.construct_replan_prompt(remaining_tasks, user, current_time, history_log)
+        if deadline_ms is None:
+            return self.plan_from_prompt(prompt, remaining_tasks)
+        return run_with_deadline(lambda: self.plan_from_prompt(prompt, remaining_tasks),
+                                 lambda: heuristic_plan(remaining_tasks, user, self.ranker), deadline_ms, self._background)
+
+    @profiled("replan")
+    def replan_stream(self, remaining_tasks: List[Task], user: UserProfile, current_time: int, history_log: List[str]) -> LazyPlan:
+        """Streaming replan: the next task is available as soon as the LLM emits its ID."""
+        prompt = self.construct_replan_prompt(remaining_tasks, user, current_time, history_log)
+        return LazyPlan(self.stream_plan_from_prompt(prompt, remaining_tasks))
+
+    def construct_replan_prompt(self, remaining_tasks: List[Task], user: UserProfile, current_time: int, history_log: List[str]) -> str:
         task_list_str = "\n".join(
             [f"- ID: {t.id} | Desc: {t.description} | Est: {t.estimated_duration_mins}m" 
              for t in remaining_tasks]
@@ -115,27 +276,85 @@ class AgenticPlanner:
             "ordered_task_ids": ["id_remaining_1", ...]
         }}
         """
-        return self.plan_from_prompt(prompt, remaining_tasks)
+        return prompt
 
-    def plan_from_prompt(self, prompt: str, tasks: List[Task]) -> List[Task]:
-        """Helper to handle the LLM call and parsing"""
+    def plan_from_prompt(self, prompt: str, tasks: List[Task], fallback: Optional[List[Task]] = None) -> List[Task]:
+        """
+        Helper to handle the LLM call and parsing. A failed call returns `fallback` (e.g. the plan
+        being refined) if one is given, otherwise a FallbackPlan.
+        """
         response_json = self.llm.generate_plan(prompt)
+        with span("reconcile"):
+            ordered = self._reconcile(response_json, tasks)
+        if fallback is not None and isinstance(ordered, FallbackPlan):
+            print("[Agent]: Keeping the previous plan.")
+            return fallback
+        return ordered
+
+    def stream_plan_from_prompt(self, prompt: str, tasks: List[Task],
+                                fallback: Optional[List[Task]] = None) -> Iterator[Task]:
+        """
+        Streaming twin of plan_from_prompt: yields each Task the moment its ID is decoded.
+        If no known ID arrives, yields `fallback` (when given) instead of the input order.
+        Returns False (so LazyPlan skips on_complete) if the stream was cut off or held no known IDs,
+        unless a valid fallback plan was used in full.
+        """
+        parser = IncrementalPlanParser()
+        task_map = {t.id: t for t in tasks}
+        emitted = set()
+        for chunk in self.llm.generate_plan_stream(prompt + STREAM_ORDER_HINT):
+            for tid in parser.feed(chunk):
+                if tid in task_map and tid not in emitted:
+                    emitted.add(tid)
+                    yield task_map[tid]
+
+        # The rationale is only complete once the whole object has arrived
+        complete = bool(emitted)
+        try:
+            rationale = json.loads(self.llm._clean_json_string(parser.text)).get("rationale", "No rationale.")
+        except (json.JSONDecodeError, AttributeError):
+            rationale = "No rationale (incomplete response)."
+            complete = False
+        print(f"[Agent Thought]: {rationale}")
+        if not emitted and fallback is not None:
+            print("[Agent]: Streamed plan failed. Keeping the previous plan.")
+            complete = not isinstance(fallback, FallbackPlan)
+
+        # Append forgotten tasks
+        for t in (fallback if fallback is not None else tasks):
+            if t.id not in emitted:
+                yield t
+        return complete
+
+    def _reconcile(self, response_json: dict, tasks: List[Task]) -> List[Task]:
+        """
+        Maps the LLM's ordered IDs back onto Task objects (each task once).
+        Returns a FallbackPlan (input order) if the call failed or no known ID came back.
+        """
         try:
+            if "error" in response_json:
+                print(f"[Agent]: LLM call failed ({response_json['error']}). Falling back to input order.")
+                return FallbackPlan(tasks)
             ordered_ids = response_json.get("ordered_task_ids", [])
             rationale = response_json.get("rationale", "No rationale.")
             print(f"[Agent Thought]: {rationale}")
             
             task_map = {t.id: t for t in tasks}
             ordered_tasks = []
+            seen = set()
             for tid in ordered_ids:
-                if tid in task_map:
+                if tid in task_map and tid not in seen:
+                    seen.add(tid)
                     ordered_tasks.append(task_map[tid])
+            if not ordered_tasks:
+                print("[Agent]: No known task IDs in the LLM response. Falling back to input order.")
+                return FallbackPlan(tasks)
             
             # Append forgotten tasks
             for t in tasks:
-                if t not in ordered_tasks:
+                if t.id not in seen:
                     ordered_tasks.append(t)
             return ordered_tasks
         except Exception as e:
             print(f"Parsing Error: {e}")
-            return tasks
\ No newline at end of file
+            return FallbackPlan(tasks)
\ No newline at end of file
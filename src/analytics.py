@@ -0,0 +1,206 @@
+import glob
+import json
+import os
+import numpy as np
+import pandas as pd
+from typing import List, Dict, Any, Optional
+from src.config import load_config
+
+STORE_DIR = "data/analytics"
+SUMMARY_FILE = "summary.json"
+
+# metric -> (low, high, bins) for the mergeable histogram sketch used for quantiles
+DEFAULT_METRICS = {
+    "success_rate": [0.0, 1.0, 100],
+    "energy_left": [-50.0, 100.0, 150],
+    "tasks_completed": [0, 20, 20],
+}
+
+class MetricSummary:
+    """
+    Incrementally maintained stats for one metric of one (agent, config) group.
+    count/mean/M2 are merged with Chan's parallel formula; quantiles come from a
+    fixed-bin histogram, so merging and querying are O(bins) no matter how many episodes.
+    """
+    def __init__(self, low: float, high: float, bins: int, state: Optional[Dict[str, Any]] = None):
+        self.low, self.high, self.bins = low, high, bins
+        state = state or {}
+        self.count = state.get("count", 0)
+        self.mean = state.get("mean", 0.0)
+        self.m2 = state.get("m2", 0.0)
+        self.min = state.get("min", float("inf"))
+        self.max = state.get("max", float("-inf"))
+        self.hist = np.asarray(state.get("hist", np.zeros(bins)), dtype=np.int64)
+
+    def update(self, values: np.ndarray):
+        values = np.asarray(values, dtype=np.float64)
+        n = len(values)
+        if n == 0:
+            return
+        b_mean = values.mean()
+        self._merge_moments(n, b_mean, ((values - b_mean) ** 2).sum(), float(values.min()), float(values.max()))
+        idx = np.clip(((values - self.low) / (self.high - self.low) * self.bins).astype(int), 0, self.bins - 1)
+        self.hist += np.bincount(idx, minlength=self.bins)
+
+    def merge(self, other: "MetricSummary"):
+        if other.count:
+            self._merge_moments(other.count, other.mean, other.m2, other.min, other.max)
+            self.hist += other.hist
+
+    def _merge_moments(self, n, mean, m2, lo, hi):
+        total = self.count + n
+        delta = mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += m2 + delta ** 2 * self.count * n / total
+        self.count = total
+        self.min = min(self.min, lo)
+        self.max = max(self.max, hi)
+
+    @property
+    def variance(self) -> float:
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    def quantile(self, q: float) -> float:
+        """Approximate quantile (interpolated within a bin, clamped to the observed min/max)."""
+        if self.count == 0:
+            return float("nan")
+        cum = np.cumsum(self.hist)
+        target = q * self.count
+        i = int(np.searchsorted(cum, target))
+        i = min(i, self.bins - 1)
+        prev = cum[i - 1] if i > 0 else 0
+        frac = (target - prev) / self.hist[i] if self.hist[i] else 0.0
+        width = (self.high - self.low) / self.bins
+        value = self.low + (i + frac) * width
+        return float(np.clip(value, self.min, self.max))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"count": self.count, "mean": self.mean, "m2": self.m2, "min": self.min, "max": self.max,
+                "hist": self.hist.tolist()}
+
+class AnalyticsStore:
+    """
+    Episode results stored as columnar partitions (one .npz per append per agent) plus a
+    small summary file that is updated on every append. Dashboards read only the summary;
+    raw partitions are loaded on demand for drill-down.
+
+    Layout:
+        data/analytics/summary.json
+        data/analytics/episodes/agent=<name>/part-00000.npz
+    """
+    def __init__(self, root: str = STORE_DIR, metrics: Optional[Dict[str, List[float]]] = None):
+        self.root = root
+        self.metrics = metrics or {**DEFAULT_METRICS, **(load_config("analytics").get("metrics") or {})}
+        self.summary_path = os.path.join(root, SUMMARY_FILE)
+        self.groups: Dict[str, Dict[str, MetricSummary]] = {}
+        self.num_partitions = 0
+        if os.path.exists(self.summary_path):
+            self._load_summary()
+
+    def is_empty(self) -> bool:
+        return not self.groups
+
+    def append(self, df: pd.DataFrame):
+        """Adds a batch of episode rows (needs an 'agent' column; an optional 'config' column groups further)."""
+        if df.empty:
+            return
+        df = df.copy()
+        if "config" not in df.columns:
+            df["config"] = "default"
+
+        for agent, part in df.groupby("agent"):
+            # 1. Columnar partition for drill-down
+            part_dir = os.path.join(self.root, "episodes", f"agent={agent}")
+            os.makedirs(part_dir, exist_ok=True)
+            path = os.path.join(part_dir, f"part-{self.num_partitions:05d}.npz")
+            columns = {}
+            for c in part.columns:
+                values = part[c].to_numpy()
+                columns[c] = values.astype(str) if values.dtype == object else values
+            np.savez(path, **columns)
+            self.num_partitions += 1
+
+            # 2. Incremental summaries per (agent, config)
+            for config, group in part.groupby("config"):
+                key = f"{agent}|{config}"
+                summaries = self.groups.setdefault(key, {m: MetricSummary(*spec) for m, spec in self.metrics.items()})
+                for metric, summary in summaries.items():
+                    if metric in group.columns:
+                        summary.update(group[metric].to_numpy())
+
+        self._save_summary()
+
+    def ingest_csv(self, path: str) -> bool:
+        """One-time import of a legacy results CSV into an empty store."""
+        if not self.is_empty() or not os.path.exists(path):
+            return False
+        self.append(pd.read_csv(path))
+        return True
+
+    def _merged(self, by_config: bool) -> Dict[tuple, Dict[str, MetricSummary]]:
+        """Summaries keyed by (agent, config), or by (agent,) with configs merged together."""
+        merged: Dict[tuple, Dict[str, MetricSummary]] = {}
+        for key, summaries in self.groups.items():
+            agent, config = key.split("|", 1)
+            label = (agent, config) if by_config else (agent,)
+            target = merged.setdefault(label, {m: MetricSummary(s.low, s.high, s.bins) for m, s in summaries.items()})
+            for m, s in summaries.items():
+                target[m].merge(s)
+        return merged
+
+    def summary_frame(self, by_config: bool = False) -> pd.DataFrame:
+        """One row per agent (or agent/config): count plus mean and std of every metric. Reads no raw data."""
+        rows = []
+        for label, summaries in self._merged(by_config).items():
+            row = {"agent": label[0]}
+            if by_config:
+                row["config"] = label[1]
+            row["count"] = max(s.count for s in summaries.values())
+            for metric, s in summaries.items():
+                row[metric] = s.mean
+                row[f"{metric}_std"] = np.sqrt(s.variance)
+            rows.append(row)
+        return pd.DataFrame(rows)
+
+    def box_stats(self, metric: str, by_config: bool = False) -> List[Dict[str, Any]]:
+        """Box-plot statistics in the format matplotlib's Axes.bxp() expects, from the sketches."""
+        stats = []
+        for label, summaries in self._merged(by_config).items():
+            s = summaries[metric]
+            label = " / ".join(label)
+            q1, med, q3 = s.quantile(0.25), s.quantile(0.5), s.quantile(0.75)
+            iqr = q3 - q1
+            stats.append({
+                "label": label, "med": med, "q1": q1, "q3": q3, "mean": s.mean,
+                "whislo": max(s.min, q1 - 1.5 * iqr), "whishi": min(s.max, q3 + 1.5 * iqr), "fliers": [],
+            })
+        return stats
+
+    def load_episodes(self, agent: Optional[str] = None) -> pd.DataFrame:
+        """Drill-down: reads the raw partitions (optionally for one agent only)."""
+        pattern = os.path.join(self.root, "episodes", f"agent={agent}" if agent else "agent=*", "part-*.npz")
+        frames = []
+        for path in sorted(glob.glob(pattern)):
+            with np.load(path) as data:
+                frames.append(pd.DataFrame({k: data[k] for k in data.files}))
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+    def _load_summary(self):
+        with open(self.summary_path, 'r') as f:
+            data = json.load(f)
+        self.num_partitions = data.get("num_partitions", 0)
+        self.groups = {
+            key: {m: MetricSummary(*self.metrics[m], state=state) for m, state in summaries.items() if m in self.metrics}
+            for key, summaries in data["groups"].items()
+        }
+
+    def _save_summary(self):
+        os.makedirs(self.root, exist_ok=True)
+        data = {
+            "num_partitions": self.num_partitions,
+            "groups": {key: {m: s.to_dict() for m, s in summaries.items()} for key, summaries in self.groups.items()},
+        }
+        tmp_path = self.summary_path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.summary_path)
@@ -0,0 +1,164 @@
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from typing import List, Callable, Optional, Union
+import numpy as np
+from src.simulation.models import Task, UserProfile
+from src.ranker import RankingModel, _topological_order
+
+class SourcedPlan(list):
+    """A plan tagged with the path that produced it: 'llm', 'cache', 'ranker' or 'fallback'."""
+    def __init__(self, tasks=(), source: str = "llm"):
+        super().__init__(tasks)
+        self.source = source
+
+class FallbackPlan(SourcedPlan):
+    """
+    The input order, returned when the LLM call failed (API error, unparsable JSON, no known IDs).
+    It is a valid plan to execute, but it must never be cached, logged as an LLM plan or swapped in
+    over a heuristic plan.
+    """
+    def __init__(self, tasks=()):
+        super().__init__(tasks, source="fallback")
+
+def heuristic_plan(tasks: List[Task], user: UserProfile, ranker: Optional[RankingModel] = None) -> List[Task]:
+    """
+    Instant local plan: the ranker's ordering when a model is available, otherwise
+    priority, then deadline, then longest first (hard tasks while energy is high),
+    always respecting dependencies.
+    """
+    if ranker is not None:
+        ranked, _ = ranker.rank(tasks, user)
+        return ranked
+    scores = np.array([-t.priority * 1e6 - t.deadline_day * 1e3 + t.estimated_duration_mins / 1e3 for t in tasks])
+    return [tasks[i] for i in _topological_order(tasks, scores)]
+
+class AnytimePlan:
+    """
+    Plan handed back when the latency budget expires before the LLM answers.
+    It starts as the heuristic ordering; the LLM plan is swapped in at the next task boundary
+    (the execution loop's `while pending_tasks:` check, or an explicit poll()), reordering
+    only the tasks that are still pending. Indexing and pop() never swap, so the task
+    fetched with pending[0] is always the one removed by pop(0).
+    """
+    def __init__(self, initial: List[Task], future: Future):
+        self._items = list(initial)
+        self._future: Optional[Future] = future
+        self.source = "heuristic"  # becomes "llm" once the background plan is swapped in
+
+    def poll(self) -> bool:
+        """Swaps in the background plan if it has finished. Returns True exactly once, when it does."""
+        if self._future is None or not self._future.done():
+            return False
+        future, self._future = self._future, None
+        try:
+            better = future.result()
+        except Exception as e:
+            print(f"[Anytime]: Background plan failed ({e}). Keeping the heuristic plan.")
+            return False
+        if isinstance(better, FallbackPlan):
+            print("[Anytime]: LLM call failed. Keeping the heuristic plan.")
+            return False
+        pending = {t.id for t in self._items}
+        reordered = [t for t in better if t.id in pending]
+        seen = {t.id for t in reordered}
+        self._items = reordered + [t for t in self._items if t.id not in seen]
+        self.source = "llm"
+        print("[Anytime]: LLM plan arrived. Swapped in at the task boundary.")
+        return True
+
+    @property
+    def pending_refinement(self) -> bool:
+        return self._future is not None
+
+    def cancel(self):
+        """Drops the background plan: it is never swapped in (and never started, if still queued)."""
+        if self._future is not None:
+            self._future.cancel()
+            self._future = None
+
+    def __bool__(self) -> bool:
+        self.poll()
+        return bool(self._items)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __getitem__(self, index):
+        return self._items[index]
+
+    def __iter__(self):
+        return iter(list(self._items))
+
+    def pop(self, index: int = -1) -> Task:
+        return self._items.pop(index)
+
+    def __repr__(self) -> str:
+        return f"AnytimePlan({self._items!r}, source={self.source})"
+
+def plan_source(plan, default: str = "llm") -> str:
+    """
+    Which path produced `plan`, for the ranker training log. An AnytimePlan is 'anytime' even
+    after the swap, since execution may already have started on the heuristic order.
+    """
+    if isinstance(plan, AnytimePlan):
+        return "anytime"
+    return getattr(plan, "source", default)
+
+class AnytimeExecutor:
+    """
+    Runs deadline-bound LLM pipelines on daemon threads (at most max_workers at once), so a script
+    can exit without waiting for plans nobody will use. Each submit() starts a new generation that
+    supersedes the previous one: the previous AnytimePlan is cancelled, and superseded jobs that have
+    not started yet are skipped without calling the LLM. One planner serves one execution loop.
+    """
+    def __init__(self, max_workers: int = 2):
+        self._slots = threading.Semaphore(max_workers)
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._current: Optional[AnytimePlan] = None
+
+    def submit(self, compute: Callable[[], List[Task]]) -> Future:
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+            previous, self._current = self._current, None
+        if previous is not None:
+            previous.cancel()
+
+        future: Future = Future()
+        def run():
+            with self._slots:
+                if generation != self._generation:
+                    future.cancel()  # Superseded while waiting for a slot
+                if not future.set_running_or_notify_cancel():
+                    return
+                try:
+                    future.set_result(compute())
+                except BaseException as e:
+                    future.set_exception(e)
+        threading.Thread(target=run, name="anytime-plan", daemon=True).start()
+        return future
+
+    def track(self, plan: AnytimePlan):
+        """Remembers the plan still waiting for `plan`'s future, so the next submit() can cancel it."""
+        with self._lock:
+            self._current = plan
+
+def run_with_deadline(compute: Callable[[], List[Task]], fallback: Callable[[], List[Task]], deadline_ms: float,
+                      executor: AnytimeExecutor) -> Union[List[Task], AnytimePlan]:
+    """
+    Starts `compute` (the LLM pipeline) in the background and waits at most deadline_ms for it.
+    Returns its plan if it finished in time, otherwise an AnytimePlan seeded with `fallback()`.
+    """
+    start = time.perf_counter()
+    future = executor.submit(compute)
+    initial = fallback()  # Cheap; built while the LLM call is already in flight
+    remaining = deadline_ms / 1000 - (time.perf_counter() - start)
+    try:
+        return future.result(timeout=max(0.0, remaining))
+    except FutureTimeout:
+        print(f"[Anytime]: LLM not ready within {deadline_ms:.0f}ms. Starting with the heuristic plan.")
+        plan = AnytimePlan(initial, future)
+        executor.track(plan)
+        return plan
@@ -0,0 +1,122 @@
+import json
+import os
+import random
+import shutil
+import numpy as np
+import pandas as pd
+from typing import Dict, Any, List, Optional
+from src.profiling import profiled
+
+MANIFEST_FILE = "manifest.json"
+
+def _atomic_write(path: str, write_fn):
+    """Writes to a temp file first so a crash mid-write never leaves a corrupt checkpoint."""
+    tmp_path = path + ".tmp"
+    write_fn(tmp_path)
+    os.replace(tmp_path, path)
+
+def capture_rng_state() -> Dict[str, Any]:
+    """Snapshot of the global RNGs the simulation draws from (JSON-serializable)."""
+    name, keys, pos, has_gauss, cached_gauss = np.random.get_state()
+    py_version, py_internal, py_gauss = random.getstate()
+    return {
+        "numpy": [name, keys.tolist(), pos, has_gauss, cached_gauss],
+        "python": [py_version, list(py_internal), py_gauss],
+    }
+
+def restore_rng_state(state: Dict[str, Any]):
+    name, keys, pos, has_gauss, cached_gauss = state["numpy"]
+    np.random.set_state((name, np.asarray(keys, dtype=np.uint32), pos, has_gauss, cached_gauss))
+    py_version, py_internal, py_gauss = state["python"]
+    random.setstate((py_version, tuple(py_internal), py_gauss))
+
+class RunCheckpoint:
+    """
+    Directory-backed checkpoint for a long-running job.
+
+    Layout:
+        <run_dir>/manifest.json      run config, completed shard ids, RNG state at the last shard
+        <run_dir>/shard_00000.csv    records produced by each completed shard
+    """
+    def __init__(self, run_dir: str):
+        self.run_dir = run_dir
+        self.manifest_path = os.path.join(run_dir, MANIFEST_FILE)
+        self.manifest: Dict[str, Any] = {}
+
+    def exists(self) -> bool:
+        return os.path.exists(self.manifest_path)
+
+    def start(self, config: Dict[str, Any]):
+        """Begins a fresh run, discarding any previous checkpoint in this directory."""
+        if os.path.exists(self.run_dir):
+            shutil.rmtree(self.run_dir)
+        os.makedirs(self.run_dir, exist_ok=True)
+        self.manifest = {"config": config, "completed_shards": [], "rng_state": None}
+        self._write_manifest()
+
+    def load(self) -> Dict[str, Any]:
+        """Loads the manifest of an interrupted run and returns its config."""
+        with open(self.manifest_path, 'r') as f:
+            self.manifest = json.load(f)
+        return self.manifest["config"]
+
+    def warn_overrides(self, requested: Dict[str, Any]):
+        """
+        A resumed run keeps its original config. Warns about every explicitly requested value
+        (None = not given) that differs from it, instead of silently ignoring it.
+        """
+        for key, value in requested.items():
+            if value is not None and value != self.config.get(key):
+                print(f"[Resume]: Ignoring {key}={value!r}; this checkpoint was started with "
+                      f"{key}={self.config.get(key)!r}. Drop --resume to start over.")
+
+    @property
+    def config(self) -> Dict[str, Any]:
+        return self.manifest["config"]
+
+    @property
+    def completed_shards(self) -> List[int]:
+        return self.manifest["completed_shards"]
+
+    @property
+    def rng_state(self) -> Optional[Dict[str, Any]]:
+        return self.manifest.get("rng_state")
+
+    def shard_path(self, shard_id: int) -> str:
+        return os.path.join(self.run_dir, f"shard_{shard_id:05d}.csv")
+
+    @profiled("checkpoint_write")
+    def save_shard(self, shard_id: int, records: List[Dict[str, Any]], rng_state: Optional[Dict[str, Any]] = None,
+                   extra: Optional[Dict[str, Any]] = None):
+        """
+        Persists one finished shard. The shard file is written before the manifest,
+        so a shard only counts as done once the manifest lists it.
+        """
+        df = pd.DataFrame(records)
+        _atomic_write(self.shard_path(shard_id), lambda p: df.to_csv(p, index=False))
+
+        self.manifest["completed_shards"].append(shard_id)
+        self.manifest["rng_state"] = rng_state
+        if extra:
+            self.manifest.update(extra)
+        self._write_manifest()
+
+    def update(self, **fields):
+        """Stores extra run state (e.g. which shards were already exported) in the manifest."""
+        self.manifest.update(fields)
+        self._write_manifest()
+
+    @profiled("csv_read")
+    def load_records(self, shard_ids: Optional[List[int]] = None) -> pd.DataFrame:
+        """Completed shards (all, or only `shard_ids`) concatenated in shard order."""
+        shard_ids = self.completed_shards if shard_ids is None else shard_ids
+        frames = [pd.read_csv(self.shard_path(i)) for i in sorted(shard_ids)]
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, ignore_index=True)
+
+    def _write_manifest(self):
+        def write(path):
+            with open(path, 'w') as f:
+                json.dump(self.manifest, f, indent=2)
+        _atomic_write(self.manifest_path, write)
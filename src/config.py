@@ -0,0 +1,20 @@
+import os
+import yaml
+from typing import Dict, Any
+
+CONFIG_FILE = "config.yaml"
+
+def load_config(section: str = None, path: str = CONFIG_FILE) -> Dict[str, Any]:
+    """
+    Reads config.yaml (or a single top-level section of it).
+    Missing file or section returns an empty dict so callers can fall back to defaults.
+    """
+    if not os.path.exists(path):
+        return {}
+
+    with open(path, 'r') as f:
+        data = yaml.safe_load(f) or {}
+
+    if section is None:
+        return data
+    return data.get(section) or {}
@@ -1,15 +1,47 @@
+import hashlib
+import threading
+from collections import OrderedDict
 from typing import List
 from src.llm_client import LLMClient
 from src.simulation.models import UserProfile, Task
+from src.profiling import profiled
+
+def critique_key(tasks_ordered: List[Task], user: UserProfile) -> str:
+    """
+    Hash of exactly what the critic sees: the ordered task lines and the work window.
+    Task IDs are not in the prompt (and are batch-local), so they are left out.
+    """
+    blob = "\n".join(f"{t.description}|{t.estimated_duration_mins}|{t.priority}" for t in tasks_ordered)
+    blob += f"\n{user.start_hour}-{user.end_hour}"
+    return hashlib.sha256(blob.encode()).hexdigest()
 
 class PlanCritic:
-    def __init__(self):
+    def __init__(self, memo_size: int = 1024):
         self.llm = LLMClient()
+        # Per-session table of orderings already critiqued -> feedback (repeats cost no LLM call),
+        # capped at memo_size entries with least-recently-used eviction
+        self.memo: "OrderedDict[str, str]" = OrderedDict()
+        self.memo_size = memo_size
+        self.memo_hits = 0
+        self._lock = threading.Lock()  # Shared by concurrent requests in the planning service
+
+    def has_critique(self, tasks_ordered: List[Task], user: UserProfile) -> bool:
+        with self._lock:
+            return critique_key(tasks_ordered, user) in self.memo
 
+    @profiled("critique_plan")
     def critique_plan(self, tasks_ordered: List[Task], user: UserProfile) -> str:
         """
         Looks for logical flaws in the plan effectively acting as an adversarial agent.
+        An ordering that was already critiqued this session gets its earlier feedback back.
         """
+        key = critique_key(tasks_ordered, user)
+        with self._lock:
+            if key in self.memo:
+                self.memo_hits += 1
+                self.memo.move_to_end(key)
+                return self.memo[key]
+
         plan_summary = "\n".join([
             f"- {t.description} (Est: {t.estimated_duration_mins}m, Priority: {t.priority})"
             for t in tasks_ordered
@@ -39,4 +71,12 @@ class PlanCritic:
         
         # We reuse the robust LLM client which handles JSON cleaning
         response = self.llm.generate_plan(prompt)
-        return response.get("feedback", "APPROVED")
\ No newline at end of file
+        feedback = response.get("feedback") if isinstance(response, dict) and "error" not in response else None
+        if not isinstance(feedback, str) or not feedback.strip():
+            return "APPROVED"  # Don't remember failed, empty (safety-blocked) or malformed responses
+        with self._lock:
+            self.memo[key] = feedback
+            self.memo.move_to_end(key)
+            while len(self.memo) > self.memo_size:
+                self.memo.popitem(last=False)
+        return feedback
\ No newline at end of file
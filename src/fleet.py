@@ -0,0 +1,326 @@
+import heapq
+import itertools
+from collections import deque
+from typing import List, Dict, Any, Optional, Callable, Sequence
+import numpy as np
+import pandas as pd
+from src.simulation.models import UserProfile, TaskStatus
+from src.simulation.env import SimulationEnvironment
+from src.simulation.workload import generate_workload
+from src.simulation.task_table import TaskTable
+from src.anytime import heuristic_plan
+from src.ranker import load_ranker_from_config
+from src.config import load_config
+
+FLEET_DIR = "data/fleet"
+POLICIES = ("fair", "fifo")
+
+# Lower = served first. Replans block a user mid-day, drafts only delay the start.
+DEFAULT_PRIORITIES = {"replan": 0, "critique": 1, "refine": 1, "draft": 2}
+# Mean LLM service time per call kind, in seconds (lognormal around it)
+DEFAULT_SERVICE_S = {"draft": 6.0, "critique": 3.0, "refine": 6.0, "replan": 5.0}
+
+class EventLoop:
+    """Shared simulated clock (seconds since the fleet's day started)."""
+    def __init__(self):
+        self.now = 0.0
+        self._heap = []
+        self._seq = itertools.count()  # Ties run in scheduling order, so runs are deterministic
+
+    def schedule(self, at: float, fn: Callable[[], None]):
+        heapq.heappush(self._heap, (at, next(self._seq), fn))
+
+    def run(self):
+        while self._heap:
+            self.now, _, fn = heapq.heappop(self._heap)
+            fn()
+
+class _Request:
+    __slots__ = ("tenant", "kind", "service_s", "callback", "submitted", "dispatched")
+
+    def __init__(self, tenant: "Tenant", kind: str, service_s: float, callback: Callable[[], None], submitted: float):
+        self.tenant = tenant
+        self.kind = kind
+        self.service_s = service_s
+        self.callback = callback
+        self.submitted = submitted
+        self.dispatched = None
+
+class LLMScheduler:
+    """
+    Central gate in front of one shared LLM quota: at most `capacity` calls in flight and,
+    optionally, `rpm` calls started per minute (token bucket).
+
+    policy="fair": strict priority between call kinds (replans first), and within a kind the
+    tenant with the least weighted service so far goes next.
+    policy="fifo": one global queue in arrival order (the baseline).
+    """
+    def __init__(self, loop: EventLoop, capacity: int = 8, rpm: Optional[float] = None, policy: str = "fair",
+                 priorities: Optional[Dict[str, int]] = None, service_s: Optional[Dict[str, float]] = None,
+                 service_sigma: float = 0.3, rng: Optional[np.random.Generator] = None):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown scheduling policy '{policy}'. Choose from {POLICIES}.")
+        self.loop = loop
+        self.capacity = capacity
+        self.rpm = rpm
+        self.policy = policy
+        self.priorities = priorities or DEFAULT_PRIORITIES
+        self.service_s = service_s or DEFAULT_SERVICE_S
+        self.service_sigma = service_sigma
+        self.rng = rng or np.random.default_rng()
+
+        self.busy = 0
+        self.queued = 0
+        self._fifo: deque = deque()
+        self._levels: Dict[int, Dict[int, deque]] = {}   # priority -> tenant id -> requests
+        self._served: Dict[int, float] = {}              # tenant id -> service seconds / weight
+        self._tokens = float(rpm or 0)
+        self._last_refill = 0.0
+        self._wake_pending = False
+        self.records: List[Dict[str, Any]] = []
+
+    def submit(self, tenant: "Tenant", kind: str, callback: Callable[[], None]):
+        mean = self.service_s[kind]
+        service = float(self.rng.lognormal(np.log(mean) - self.service_sigma ** 2 / 2, self.service_sigma))
+        req = _Request(tenant, kind, service, callback, self.loop.now)
+        if self.policy == "fifo":
+            self._fifo.append(req)
+        else:
+            level = self._levels.setdefault(self.priorities[kind], {})
+            level.setdefault(tenant.tenant_id, deque()).append(req)
+        self.queued += 1
+        self._dispatch()
+
+    def _pick(self) -> _Request:
+        if self.policy == "fifo":
+            return self._fifo.popleft()
+        for priority in sorted(self._levels):
+            level = self._levels[priority]
+            if level:
+                tid = min(level, key=lambda t: (self._served.get(t, 0.0), t))
+                req = level[tid].popleft()
+                if not level[tid]:
+                    del level[tid]
+                return req
+
+    def _take_token(self) -> bool:
+        if not self.rpm:
+            return True
+        now = self.loop.now
+        self._tokens = min(self.rpm, self._tokens + (now - self._last_refill) * self.rpm / 60)
+        self._last_refill = now
+        if self._tokens >= 1 - 1e-9:  # Tolerance: a wake-up lands exactly on the refill time
+            self._tokens = max(0.0, self._tokens - 1)
+            return True
+        if not self._wake_pending:
+            self._wake_pending = True
+            self.loop.schedule(now + (1 - self._tokens) * 60 / self.rpm, self._wake)
+        return False
+
+    def _wake(self):
+        self._wake_pending = False
+        self._dispatch()
+
+    def _dispatch(self):
+        while self.busy < self.capacity and self.queued and self._take_token():
+            req = self._pick()
+            self.queued -= 1
+            self.busy += 1
+            req.dispatched = self.loop.now
+            tid = req.tenant.tenant_id
+            self._served[tid] = self._served.get(tid, 0.0) + req.service_s / req.tenant.weight
+            self.loop.schedule(self.loop.now + req.service_s, lambda r=req: self._complete(r))
+
+    def _complete(self, req: _Request):
+        self.busy -= 1
+        now = self.loop.now
+        self.records.append({
+            "tenant": req.tenant.tenant_id, "weight": req.tenant.weight, "kind": req.kind,
+            "queue_delay_s": req.dispatched - req.submitted, "latency_s": now - req.submitted,
+            "service_s": req.service_s,
+        })
+        req.callback()
+        self._dispatch()
+
+class Tenant:
+    """
+    One simulated user's day running the run_agentic_loop cycle (draft -> critique -> refine ->
+    execute, replanning after delays). The user does no work while waiting for the LLM,
+    so queueing delay is lost working time.
+    """
+    def __init__(self, tenant_id: int, user: UserProfile, table: TaskTable, weight: float, fleet: "FleetSimulation",
+                 rng: np.random.Generator):
+        self.tenant_id = tenant_id
+        self.user = user
+        self.table = table
+        self.weight = weight
+        self.fleet = fleet
+        # Own stream for the critic's verdicts and task outcomes: the draws a tenant sees do not depend
+        # on how other tenants' events interleave, so runs under different policies are paired
+        self.rng = rng
+        self.env = SimulationEnvironment(user, rng=rng)
+        self.pending: List[int] = []
+        self.completed = 0
+        self.replans = 0
+        self.first_task_s: Optional[float] = None
+        self.finished_s: Optional[float] = None
+
+    # Clock conversion: the env keeps minutes since midnight, the fleet seconds since start_hour
+    def _sync_env_clock(self):
+        self.env.current_time = max(self.env.current_time, self.user.start_hour * 60 + self.fleet.loop.now / 60)
+
+    def _env_to_fleet(self) -> float:
+        return (self.env.current_time - self.user.start_hour * 60) * 60
+
+    def _plan(self, rows: List[int]) -> List[int]:
+        """Local stand-in for the LLM's ordering (the simulation models LLM cost, not its answer)."""
+        ordered = heuristic_plan(self.table.to_tasks(rows), self.user, self.fleet.ranker)
+        return [self.table.row(t.id) for t in ordered]
+
+    def start(self):
+        self.fleet.scheduler.submit(self, "draft", self._after_draft)
+
+    def _after_draft(self):
+        self.pending = self._plan(list(range(len(self.table))))
+        if self.fleet.use_reflexion:
+            self.fleet.scheduler.submit(self, "critique", self._after_critique)
+        else:
+            self._next_task()
+
+    def _after_critique(self):
+        if self.rng.random() < self.fleet.flaw_prob:
+            self.fleet.scheduler.submit(self, "refine", self._next_task)
+        else:
+            self._next_task()
+
+    def _after_replan(self):
+        self.replans += 1
+        self.pending = self._plan(self.pending)
+        self._next_task()
+
+    def _next_task(self):
+        self._sync_env_clock()
+        if not self.pending or self.env.current_time >= self.user.end_hour * 60:
+            self.finished_s = self.fleet.loop.now
+            return
+        if self.first_task_s is None:
+            self.first_task_s = self.fleet.loop.now
+
+        status, msg = self.env.simulate_row(self.table, self.pending[0])
+        if status == TaskStatus.FAILED:
+            self.finished_s = self.fleet.loop.now
+            return
+        self.pending.pop(0)
+        self.completed += 1
+
+        was_delayed = "interruption" in msg or "tired" in msg
+        if was_delayed and self.pending:
+            self.fleet.loop.schedule(self._env_to_fleet(),
+                                     lambda: self.fleet.scheduler.submit(self, "replan", self._after_replan))
+        else:
+            self.fleet.loop.schedule(self._env_to_fleet(), self._next_task)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "tenant": self.tenant_id, "weight": self.weight, "total_tasks": len(self.table),
+            "tasks_completed": self.completed, "completion_rate": self.completed / len(self.table),
+            "replans": self.replans, "time_to_first_task_s": self.first_task_s, "finished_s": self.finished_s,
+            "energy_left": self.env.current_energy,
+        }
+
+class FleetSimulation:
+    """
+    Many users' days stepped on one shared simulated clock, with every LLM call routed through
+    one LLMScheduler. LLM calls are modelled (service time drawn per call kind); task execution
+    uses the real SimulationEnvironment, so lost time shows up as lower completion rates.
+    """
+    def __init__(self, num_tenants: int = 100, capacity: int = 8, rpm: Optional[float] = None, policy: str = "fair",
+                 use_reflexion: bool = True, flaw_prob: float = 0.5, seed: int = 0, scenario: Optional[str] = None,
+                 premium_fraction: float = 0.1, premium_weight: float = 3.0,
+                 priorities: Optional[Dict[str, int]] = None, service_s: Optional[Dict[str, float]] = None,
+                 ranker=None):
+        self.num_tenants = num_tenants
+        self.policy = policy
+        self.use_reflexion = use_reflexion
+        self.flaw_prob = flaw_prob
+        self.seed = seed
+        self.ranker = ranker
+        self.rng = np.random.default_rng(seed)
+        self.loop = EventLoop()
+        self.scheduler = LLMScheduler(self.loop, capacity=capacity, rpm=rpm, policy=policy, priorities=priorities,
+                                      service_s=service_s, rng=np.random.default_rng(seed + 1))
+
+        batch = generate_workload(num_tenants, scenario=scenario, rng=np.random.default_rng(seed))
+        premium = self.rng.random(num_tenants) < premium_fraction
+        streams = np.random.SeedSequence(seed).spawn(num_tenants)
+        self.tenants = [
+            Tenant(i, UserProfile(work_speed_multiplier=float(batch.user_speed[i])), TaskTable.from_batch(batch, i),
+                   premium_weight if premium[i] else 1.0, self, rng=np.random.default_rng(streams[i]))
+            for i in range(num_tenants)
+        ]
+
+    @classmethod
+    def from_config(cls, **overrides) -> "FleetSimulation":
+        cfg = load_config("fleet")
+        kwargs = {
+            "capacity": cfg.get("capacity", 8),
+            "rpm": cfg.get("rpm"),
+            "policy": cfg.get("policy", "fair"),
+            "use_reflexion": cfg.get("use_reflexion", True),
+            "flaw_prob": cfg.get("flaw_prob", 0.5),
+            "seed": cfg.get("seed", 0),
+            "scenario": cfg.get("scenario"),
+            "premium_fraction": cfg.get("premium_fraction", 0.1),
+            "premium_weight": cfg.get("premium_weight", 3.0),
+            "priorities": {**DEFAULT_PRIORITIES, **(cfg.get("priorities") or {})},
+            "service_s": {**DEFAULT_SERVICE_S, **(cfg.get("service_s") or {})},
+            "ranker": load_ranker_from_config()[0],
+        }
+        kwargs.update({k: v for k, v in overrides.items() if v is not None})
+        return cls(**kwargs)
+
+    def run(self) -> "FleetResult":
+        for tenant in self.tenants:
+            self.loop.schedule(0.0, tenant.start)  # Everyone starts at start_hour: the morning burst
+        self.loop.run()
+
+        tenants = pd.DataFrame([t.summary() for t in self.tenants])
+        requests = pd.DataFrame(self.scheduler.records)
+        per_tenant = requests.groupby("tenant").agg(llm_calls=("kind", "size"), mean_latency_s=("latency_s", "mean"),
+                                                    mean_queue_delay_s=("queue_delay_s", "mean"),
+                                                    max_queue_delay_s=("queue_delay_s", "max"))
+        return FleetResult(tenants.join(per_tenant, on="tenant"), requests, self)
+
+class FleetResult:
+    def __init__(self, tenants: pd.DataFrame, requests: pd.DataFrame, sim: FleetSimulation):
+        self.tenants = tenants
+        self.requests = requests
+        self.sim = sim
+
+    def summary(self) -> Dict[str, Any]:
+        req, ten = self.requests, self.tenants
+        row = {
+            "num_tenants": self.sim.num_tenants, "policy": self.sim.policy, "llm_calls": len(req),
+            "completion_rate": ten["completion_rate"].mean(),
+            "latency_p50_s": req["latency_s"].quantile(0.5), "latency_p95_s": req["latency_s"].quantile(0.95),
+            "queue_delay_mean_s": req["queue_delay_s"].mean(), "queue_delay_p95_s": req["queue_delay_s"].quantile(0.95),
+            # Fairness: how much worse the unluckiest tenant waited than the typical one
+            "tenant_queue_delay_median_s": ten["mean_queue_delay_s"].median(),
+            "tenant_queue_delay_worst_s": ten["mean_queue_delay_s"].max(),
+            "time_to_first_task_p95_s": ten["time_to_first_task_s"].quantile(0.95),
+        }
+        for kind, group in req.groupby("kind"):
+            row[f"{kind}_queue_delay_p95_s"] = group["queue_delay_s"].quantile(0.95)
+        return row
+
+def load_curve(tenant_counts: Sequence[int], policies: Sequence[str] = POLICIES, **kwargs) -> "tuple[pd.DataFrame, pd.DataFrame]":
+    """Runs the fleet at increasing sizes under each policy. Returns (one summary row per run, all tenant rows)."""
+    rows, tenant_frames = [], []
+    for n in tenant_counts:
+        for policy in policies:
+            result = FleetSimulation.from_config(num_tenants=n, policy=policy, **kwargs).run()
+            rows.append(result.summary())
+            tenant_frames.append(result.tenants.assign(num_tenants=n, policy=policy))
+            print(f"[Fleet]: {n} tenants, {policy}: completion {rows[-1]['completion_rate']*100:.1f}%, "
+                  f"p95 latency {rows[-1]['latency_p95_s']:.1f}s")
+    return pd.DataFrame(rows), pd.concat(tenant_frames, ignore_index=True)
@@ -3,7 +3,8 @@ import google.generativeai as genai
 from dotenv import load_dotenv
 import json
 import re
-from typing import Dict, Any
+from typing import Dict, Any, Iterator
+from src.profiling import span
 
 # Load environment variables
 load_dotenv()
@@ -41,7 +42,8 @@ class LLMClient:
         Sends context to LLM, cleans response, and parses JSON.
         """
         try:
-            response = self.model.generate_content(prompt)
+            with span("llm_wait"):
+                response = self.model.generate_content(prompt)
             
             # Check if response was blocked (safety filters)
             if not response.parts:
@@ -49,13 +51,31 @@ class LLMClient:
                 return {}
 
             raw_text = response.text
-            clean_text = self._clean_json_string(raw_text)
-            
-            return json.loads(clean_text)
+            with span("json_clean"):
+                clean_text = self._clean_json_string(raw_text)
+                return json.loads(clean_text)
             
         except json.JSONDecodeError as e:
             print(f"JSON Parsing Failed. Raw output:\n{raw_text}")
             return {"error": "Invalid JSON format", "schedule": []}
         except Exception as e:
             print(f"LLM API Error: {e}")
-            return {"error": str(e), "schedule": []}
\ No newline at end of file
+            return {"error": str(e), "schedule": []}
+
+    def generate_plan_stream(self, prompt: str) -> Iterator[str]:
+        """
+        Streams the raw response text chunk by chunk (for incremental parsing).
+        Errors end the stream early; callers fall back to whatever was received.
+        """
+        try:
+            with span("llm_wait"):
+                response = self.model.generate_content(prompt, stream=True)
+            for chunk in response:
+                try:
+                    text = chunk.text
+                except ValueError:
+                    continue  # Chunk without text parts (e.g. safety metadata)
+                if text:
+                    yield text
+        except Exception as e:
+            print(f"LLM API Error (stream): {e}")
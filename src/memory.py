@@ -1,8 +1,10 @@
 import json
 import os
+from src.profiling import profiled
 
 MEMORY_FILE = "data/agent_memory.json"
 
+@profiled("memory_save")
 def save_reflection(day_summary_log: str):
     """
     Saves a lesson to the memory file.
@@ -25,6 +27,7 @@ def save_reflection(day_summary_log: str):
     with open(MEMORY_FILE, 'w') as f:
         json.dump(data[-5:], f, indent=2)
 
+@profiled("memory_load")
 def get_past_mistakes() -> str:
     """Returns a string of past failures to warn the agent."""
     if not os.path.exists(MEMORY_FILE):
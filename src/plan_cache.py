@@ -0,0 +1,163 @@
+import hashlib
+import json
+import os
+import threading
+from collections import Counter, OrderedDict, deque
+from typing import List, Dict, Optional, Tuple
+from src.simulation.models import Task, UserProfile
+from src.config import load_config
+
+DEFAULT_BUCKETS = {
+    "work_speed_multiplier": 0.1,
+    "daily_energy_cap": 10,
+    "procrastination_prob": 0.1,
+    "focus_decay_rate": 0.05,
+}
+
+def _digest(obj) -> str:
+    return hashlib.sha1(repr(obj).encode()).hexdigest()[:16]
+
+def bucket_user(user: UserProfile, buckets: Dict[str, float] = None) -> Tuple:
+    """Rounds the continuous profile fields so near-identical users share cache entries."""
+    buckets = buckets or DEFAULT_BUCKETS
+    rounded = tuple(
+        (field, round(getattr(user, field) / size)) for field, size in sorted(buckets.items())
+    )
+    return rounded + (("start_hour", user.start_hour), ("end_hour", user.end_hour))
+
+def canonical_labels(tasks: List[Task]) -> Dict[str, str]:
+    """
+    Gives every task a label that depends only on its (duration, priority, deadline) and its
+    position in the dependency graph, not on its random ID or list position.
+    Labels are refined Weisfeiler-Lehman style (own label + labels of parents and children)
+    until the partition stops splitting.
+    """
+    ids = {t.id for t in tasks}
+    parents = {t.id: [d for d in t.dependencies if d in ids] for t in tasks}
+    children = {t.id: [] for t in tasks}
+    for tid, deps in parents.items():
+        for d in deps:
+            children[d].append(tid)
+
+    labels = {t.id: _digest((t.estimated_duration_mins, t.priority, t.deadline_day)) for t in tasks}
+    num_classes = len(set(labels.values()))
+    for _ in range(len(tasks)):
+        labels = {
+            tid: _digest((labels[tid],
+                          tuple(sorted(labels[p] for p in parents[tid])),
+                          tuple(sorted(labels[c] for c in children[tid]))))
+            for tid in labels
+        }
+        new_classes = len(set(labels.values()))
+        if new_classes == num_classes:
+            break
+        num_classes = new_classes
+    return labels
+
+def plan_signature(tasks: List[Task], user: UserProfile, flags: Tuple = (), buckets: Dict[str, float] = None):
+    """Order-invariant cache key for a planning request, plus the per-task labels it was built from."""
+    labels = canonical_labels(tasks)
+    key = _digest((tuple(sorted(labels.values())), bucket_user(user, buckets), flags))
+    return key, labels
+
+class PlanCache:
+    """
+    Maps a canonical task-set signature to a stored ordering (as a list of canonical labels).
+    On a hit the ordering is remapped onto the new request's task IDs.
+    eviction: 'lru' (refresh on hit) or 'fifo' (insertion order only).
+    """
+    def __init__(self, max_entries: int = 1024, eviction: str = "lru", path: Optional[str] = None,
+                 buckets: Dict[str, float] = None, enabled: bool = True):
+        if eviction not in ("lru", "fifo"):
+            raise ValueError(f"Unknown eviction policy '{eviction}' (use 'lru' or 'fifo')")
+        self.max_entries = max_entries
+        self.eviction = eviction
+        self.path = path
+        self.buckets = buckets or DEFAULT_BUCKETS
+        self.enabled = enabled
+        self.entries: "OrderedDict[str, List[str]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()  # Shared by concurrent requests in the planning service
+        if path and os.path.exists(path):
+            self._load()
+
+    @classmethod
+    def from_config(cls) -> "PlanCache":
+        cfg = load_config("plan_cache")
+        return cls(
+            max_entries=cfg.get("max_entries", 1024),
+            eviction=cfg.get("eviction", "lru"),
+            path=cfg.get("path"),
+            buckets={**DEFAULT_BUCKETS, **(cfg.get("buckets") or {})},
+            enabled=cfg.get("enabled", True),
+        )
+
+    def lookup(self, tasks: List[Task], user: UserProfile, flags: Tuple = ()) -> Optional[List[Task]]:
+        """Returns the cached ordering remapped onto `tasks`, or None on a miss."""
+        if not self.enabled:
+            return None
+        key, labels = plan_signature(tasks, user, flags, self.buckets)
+        with self._lock:
+            ordered_labels = self.entries.get(key)
+            if ordered_labels is not None and Counter(ordered_labels) != Counter(labels.values()):
+                # Stored by an older build that kept duplicate IDs: not a permutation of this request
+                del self.entries[key]
+                ordered_labels = None
+            if ordered_labels is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            if self.eviction == "lru":
+                self.entries.move_to_end(key)
+
+        # Tasks with the same label are interchangeable, so hand them out in input order.
+        by_label: Dict[str, deque] = {}
+        for t in tasks:
+            by_label.setdefault(labels[t.id], deque()).append(t)
+        return [by_label[label].popleft() for label in ordered_labels]
+
+    def store(self, tasks: List[Task], user: UserProfile, ordered_tasks: List[Task], flags: Tuple = ()):
+        if not self.enabled:
+            return
+        key, labels = plan_signature(tasks, user, flags, self.buckets)
+        with self._lock:
+            self.entries[key] = [labels[t.id] for t in ordered_tasks]
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+            if self.path:
+                self._save()
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self.entries),
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def report(self):
+        s = self.stats()
+        print(f"[Plan Cache]: {s['hits']} hits / {s['misses']} misses "
+              f"(hit rate {s['hit_rate']*100:.1f}%), {s['evictions']} evictions, {s['size']}/{self.max_entries} entries")
+
+    def _load(self):
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            self.entries = OrderedDict(data)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        except (json.JSONDecodeError, OSError):
+            self.entries = OrderedDict()
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, 'w') as f:
+            json.dump(self.entries, f)
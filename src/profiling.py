@@ -0,0 +1,177 @@
+import cProfile
+import contextlib
+import functools
+import json
+import os
+import pstats
+import threading
+import time
+from typing import Dict, Any, List, Optional
+
+DEFAULT_TRACE_DIR = "data/profiles"
+
+class Profiler:
+    """
+    Records nested timing spans and exports them as Chrome trace / Perfetto JSON
+    (open the file in chrome://tracing or https://ui.perfetto.dev).
+
+    With use_cprofile=True each span name also accumulates cProfile stats. Python allows
+    only one active cProfile at a time, so a nested span is counted inside its outermost
+    profiled span rather than getting its own profile. cProfile also only sees the thread
+    that enabled it, so profiles are recorded on the thread that created the Profiler;
+    spans on worker threads (background plans, service workers) are still timed.
+    """
+    def __init__(self, use_cprofile: bool = False, max_events: int = 1_000_000):
+        self.use_cprofile = use_cprofile
+        self.max_events = max_events
+        self.events: List[Dict[str, Any]] = []
+        self.dropped_events = 0
+        self.totals: Dict[str, List[float]] = {}  # name -> [count, total_us]
+        self.cprofile_stats: Dict[str, pstats.Stats] = {}
+        self._origin_ns = time.perf_counter_ns()
+        self._lock = threading.Lock()
+        self._cprofile_thread = threading.get_ident()
+        self._cprofile_active = False  # Only touched by _cprofile_thread, so no lock is needed
+
+    @contextlib.contextmanager
+    def span(self, name: str, **args):
+        prof = None
+        if self.use_cprofile and not self._cprofile_active and threading.get_ident() == self._cprofile_thread:
+            self._cprofile_active = True
+            prof = cProfile.Profile()
+            prof.enable()
+
+        start_ns = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            dur_us = (time.perf_counter_ns() - start_ns) / 1000
+            if prof is not None:
+                prof.disable()
+                self._cprofile_active = False
+            self._record(name, start_ns, dur_us, args, prof)
+
+    def _record(self, name, start_ns, dur_us, args, prof):
+        with self._lock:
+            count_total = self.totals.setdefault(name, [0, 0.0])
+            count_total[0] += 1
+            count_total[1] += dur_us
+
+            if len(self.events) < self.max_events:
+                event = {
+                    "name": name,
+                    "ph": "X",
+                    "ts": (start_ns - self._origin_ns) / 1000,
+                    "dur": dur_us,
+                    "pid": os.getpid(),
+                    "tid": threading.get_ident(),
+                }
+                if args:
+                    event["args"] = {k: str(v) for k, v in args.items()}
+                self.events.append(event)
+            else:
+                self.dropped_events += 1
+
+            if prof is not None:
+                if name in self.cprofile_stats:
+                    self.cprofile_stats[name].add(prof)
+                else:
+                    self.cprofile_stats[name] = pstats.Stats(prof)
+
+    def chrome_trace(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "traceEvents": list(self.events),
+                "displayTimeUnit": "ms",
+                "otherData": {"dropped_events": self.dropped_events},
+            }
+
+    def export_chrome_trace(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(self.chrome_trace(), f)
+
+    def dump_cprofile(self, out_dir: str) -> List[str]:
+        """Writes one .prof file per phase (view with snakeviz or pstats). Returns the paths."""
+        os.makedirs(out_dir, exist_ok=True)
+        paths = []
+        for name, stats in self.cprofile_stats.items():
+            path = os.path.join(out_dir, f"{name.replace('/', '_')}.prof")
+            stats.dump_stats(path)
+            paths.append(path)
+        return paths
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """Per-phase totals, slowest first."""
+        rows = [
+            {"phase": name, "calls": int(count), "total_ms": total_us / 1000, "mean_ms": total_us / 1000 / count}
+            for name, (count, total_us) in self.totals.items()
+        ]
+        return sorted(rows, key=lambda r: r["total_ms"], reverse=True)
+
+    def print_summary(self):
+        print("\n--- Profile (by total time) ---")
+        print(f"{'phase':<28}{'calls':>10}{'total ms':>14}{'mean ms':>12}")
+        for row in self.summary():
+            print(f"{row['phase']:<28}{row['calls']:>10}{row['total_ms']:>14.1f}{row['mean_ms']:>12.3f}")
+
+# --- Process-wide profiler (None = profiling off, spans cost almost nothing) ---
+_active: Optional[Profiler] = None
+_NULL_SPAN = contextlib.nullcontext()
+
+def enable(use_cprofile: bool = False) -> Profiler:
+    global _active
+    _active = Profiler(use_cprofile=use_cprofile)
+    return _active
+
+def disable() -> Optional[Profiler]:
+    global _active
+    prof, _active = _active, None
+    return prof
+
+def get_profiler() -> Optional[Profiler]:
+    return _active
+
+def span(name: str, **args):
+    """`with span("phase"):` records a span if profiling is on, otherwise does nothing."""
+    if _active is None:
+        return _NULL_SPAN
+    return _active.span(name, **args)
+
+def profiled(name: str):
+    """Decorator form of span() for whole functions."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _active is None:
+                return fn(*args, **kwargs)
+            with _active.span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+# --- CLI helpers shared by the scripts ---
+def add_profile_args(parser):
+    parser.add_argument("--profile", nargs="?", const="", default=None, metavar="TRACE_JSON",
+                        help=f"Record phase timings and export a Chrome trace (default: {DEFAULT_TRACE_DIR}/<script>_trace.json)")
+    parser.add_argument("--cprofile", action="store_true",
+                        help="With --profile, also write per-phase cProfile .prof files")
+
+def start_from_args(args) -> Optional[Profiler]:
+    if args.profile is None:
+        return None
+    return enable(use_cprofile=args.cprofile)
+
+def finish_from_args(args, script_name: str):
+    """Exports the trace (and cProfile dumps) if profiling was requested."""
+    prof = disable()
+    if prof is None:
+        return
+    trace_path = args.profile or os.path.join(DEFAULT_TRACE_DIR, f"{script_name}_trace.json")
+    prof.export_chrome_trace(trace_path)
+    prof.print_summary()
+    print(f"Chrome trace saved to {trace_path}")
+    if prof.use_cprofile:
+        out_dir = os.path.join(os.path.dirname(trace_path) or ".", f"{script_name}_cprofile")
+        paths = prof.dump_cprofile(out_dir)
+        print(f"cProfile output ({len(paths)} phases) saved to {out_dir}")
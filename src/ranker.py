@@ -0,0 +1,262 @@
+import itertools
+import json
+import os
+import numpy as np
+from typing import List, Dict, Any, Optional, Tuple
+from src.simulation.models import Task, UserProfile
+from src.config import load_config
+from src.plan_cache import plan_signature
+
+PLAN_LOG_FILE = "data/plan_log.jsonl"
+MODEL_FILE = "data/ranker.npz"
+
+FEATURE_NAMES = [
+    "duration_h",            # estimated_duration_mins / 60
+    "priority",              # 1 (High) .. 5 (Low)
+    "deadline_day",
+    "num_dependencies",      # parents inside this task set
+    "num_dependents",        # children inside this task set
+    "is_long",               # >= 90 minutes
+    "duration_x_speed",      # long tasks hurt more for slow users
+    "duration_x_procrastination",
+]
+
+def task_features(tasks: List[Task], user: UserProfile) -> np.ndarray:
+    """(num_tasks, num_features) matrix. User-only terms appear as interactions since they cancel pairwise."""
+    ids = {t.id for t in tasks}
+    dependents = {t.id: 0 for t in tasks}
+    for t in tasks:
+        for d in t.dependencies:
+            if d in ids:
+                dependents[d] += 1
+
+    speed, procrastination = user.work_speed_multiplier, user.procrastination_prob
+    rows = []
+    for t in tasks:
+        hours = t.estimated_duration_mins / 60
+        rows.append((
+            hours,
+            t.priority,
+            t.deadline_day,
+            sum(1 for d in t.dependencies if d in ids),
+            dependents[t.id],
+            float(t.estimated_duration_mins >= 90),
+            hours * speed,
+            hours * procrastination,
+        ))
+    return np.array(rows, dtype=np.float64)
+
+def _topological_order(tasks: List[Task], scores: np.ndarray) -> List[int]:
+    """Highest score first, but never before a dependency inside the set."""
+    index = {t.id: i for i, t in enumerate(tasks)}
+    remaining_deps = [sum(1 for d in t.dependencies if d in index) for t in tasks]
+    children = [[] for _ in tasks]
+    for i, t in enumerate(tasks):
+        for d in t.dependencies:
+            if d in index:
+                children[index[d]].append(i)
+
+    order, placed = [], [False] * len(tasks)
+    for _ in range(len(tasks)):
+        ready = [i for i in range(len(tasks)) if not placed[i] and remaining_deps[i] == 0]
+        if not ready:  # Cycle in the input: fall back to plain score order for the rest
+            ready = [i for i in range(len(tasks)) if not placed[i]]
+        best = max(ready, key=lambda i: scores[i])
+        placed[best] = True
+        order.append(best)
+        for c in children[best]:
+            remaining_deps[c] -= 1
+    return order
+
+class RankingModel:
+    """
+    Linear pairwise ranker: task i goes before task j when w . (x_i - x_j) > 0.
+    Trained with weighted logistic loss on pairs taken from logged plans.
+    """
+    def __init__(self, weights: np.ndarray, mean: np.ndarray, std: np.ndarray):
+        self.weights = weights
+        self.mean = mean
+        self.std = std
+
+    def scores(self, X: np.ndarray) -> np.ndarray:
+        return ((X - self.mean) / self.std) @ self.weights
+
+    def rank(self, tasks: List[Task], user: UserProfile) -> Tuple[List[Task], float]:
+        """
+        Returns the ordering and a confidence in [0, 1]: how decisively, on average over adjacent
+        pairs of distinct tasks, the model prefers the chosen order (0 = coin flip, 1 = certain).
+        """
+        if len(tasks) < 2:
+            return list(tasks), 1.0
+        X = task_features(tasks, user)
+        s = self.scores(X)
+        order = _topological_order(tasks, s)
+
+        # Interchangeable tasks (identical features) can go in either order, so they are skipped.
+        first, second = np.array(order[:-1]), np.array(order[1:])
+        distinct = np.any(X[first] != X[second], axis=1)
+        if not distinct.any():
+            return [tasks[i] for i in order], 1.0
+        p_keep = 1.0 / (1.0 + np.exp(-(s[first[distinct]] - s[second[distinct]])))
+        confidence = float(np.clip(2 * p_keep - 1, 0.0, 1.0).mean())
+        return [tasks[i] for i in order], confidence
+
+    def save(self, path: str = MODEL_FILE):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        np.savez(path, weights=self.weights, mean=self.mean, std=self.std,
+                 feature_names=np.array(FEATURE_NAMES))
+
+    @classmethod
+    def load(cls, path: str = MODEL_FILE) -> Optional["RankingModel"]:
+        if not os.path.exists(path):
+            return None
+        data = np.load(path)
+        if list(data["feature_names"]) != FEATURE_NAMES:
+            print(f"[Ranker]: {path} was trained on different features. Retrain with train_ranker.py.")
+            return None
+        return cls(data["weights"], data["mean"], data["std"])
+
+# --- Plan logging (training data) ---
+def log_plan(ordered_tasks: List[Task], user: UserProfile, outcome: Dict[str, Any], source: str,
+             path: str = PLAN_LOG_FILE):
+    """
+    Appends one executed plan and its simulated outcome to the JSONL training log.
+    source: the path that produced the plan ('llm', 'cache', 'ranker', 'fallback', 'anytime'
+    or 'greedy'), so training can keep only the plans it should learn from.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    record = {
+        "source": source,
+        "user": user.model_dump(),
+        "tasks": [
+            {"id": t.id, "estimated_duration_mins": t.estimated_duration_mins, "priority": t.priority,
+             "deadline_day": t.deadline_day, "dependencies": list(t.dependencies)}
+            for t in ordered_tasks
+        ],
+        "success_rate": outcome.get("success_rate"),
+        "energy_left": outcome.get("energy_left"),
+    }
+    with open(path, 'a') as f:
+        f.write(json.dumps(record) + "\n")
+
+def load_plan_log(path: str = PLAN_LOG_FILE, sources: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    if not os.path.exists(path):
+        return []
+    records = []
+    with open(path, 'r') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            rec = json.loads(line)
+            if sources is None or rec["source"] in sources:
+                records.append(rec)
+    return records
+
+def _parse_record(rec: Dict[str, Any]) -> Tuple[List[Task], UserProfile]:
+    return [Task.model_construct(description="", **t) for t in rec["tasks"]], UserProfile(**rec["user"])
+
+def outcome_pairs(records: List[Dict[str, Any]]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Pairs labelled by outcomes rather than by imitation. Plans logged for equivalent task sets
+    (same plan-cache signature) are compared two at a time: every task pair that the more
+    successful plan orders differently from the other becomes a pair in the better plan's order,
+    weighted by the success-rate gap.
+    """
+    groups: Dict[str, list] = {}
+    for rec in records:
+        tasks, user = _parse_record(rec)
+        if len(tasks) < 2:
+            continue
+        key, labels = plan_signature(tasks, user)
+        # Tasks with the same label are interchangeable, so match them by occurrence
+        seen: Dict[str, int] = {}
+        slots = []
+        for t in tasks:
+            seen[labels[t.id]] = seen.get(labels[t.id], 0) + 1
+            slots.append((labels[t.id], seen[labels[t.id]]))
+        groups.setdefault(key, []).append((rec.get("success_rate") or 0.0, tasks, user, slots))
+
+    diffs, weights = [], []
+    for plans in groups.values():
+        for a, b in itertools.combinations(plans, 2):
+            if a[0] == b[0]:
+                continue
+            (success, tasks, user, slots), worse = (a, b) if a[0] > b[0] else (b, a)
+            position = {slot: k for k, slot in enumerate(worse[3])}
+            pos = np.array([position[slot] for slot in slots])
+            i, j = np.triu_indices(len(tasks), k=1)
+            flipped = pos[i] > pos[j]
+            if not flipped.any():
+                continue
+            X = task_features(tasks, user)
+            diffs.append(X[i[flipped]] - X[j[flipped]])
+            weights.append(np.full(int(flipped.sum()), success - worse[0]))
+    if not diffs:
+        return np.empty((0, len(FEATURE_NAMES))), np.empty(0)
+    return np.vstack(diffs), np.concatenate(weights)
+
+def build_pairs(records: List[Dict[str, Any]], outcomes: bool = True) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Turns logged orderings into (x_before - x_after) difference vectors.
+    Each pair is weighted by the plan's simulated success rate, so plans that worked count more.
+    outcomes=True adds the outcome-labelled pairs from outcome_pairs().
+    Also returns every task's feature row (for standardization).
+    """
+    diffs, weights, rows = [], [], []
+    for rec in records:
+        tasks, user = _parse_record(rec)
+        if len(tasks) < 2:
+            continue
+        X = task_features(tasks, user)
+        i, j = np.triu_indices(len(tasks), k=1)
+        rows.append(X)
+        diffs.append(X[i] - X[j])
+        weights.append(np.full(len(i), 0.1 + (rec.get("success_rate") or 0.0)))
+    if outcomes and diffs:
+        D_out, w_out = outcome_pairs(records)
+        diffs.append(D_out)
+        weights.append(w_out)
+    if not diffs:
+        empty = np.empty((0, len(FEATURE_NAMES)))
+        return empty, np.empty(0), empty
+    return np.vstack(diffs), np.concatenate(weights), np.vstack(rows)
+
+def train(records: List[Dict[str, Any]], iterations: int = 25, l2: float = 1e-3, outcomes: bool = True) -> RankingModel:
+    """
+    Weighted pairwise logistic regression fitted with Newton's method.
+    With only a handful of features each step is one pass over the pairs, so CPU training takes seconds.
+    """
+    D, w_pair, all_X = build_pairs(records, outcomes)
+    if len(D) == 0:
+        raise ValueError("No logged plans with 2+ tasks to train on.")
+
+    # Standardize features (the shift cancels in differences, only the scale matters)
+    mean = all_X.mean(axis=0)
+    std = all_X.std(axis=0)
+    std[std == 0] = 1.0
+    D = D / std
+
+    w = np.zeros(D.shape[1])
+    w_pair = w_pair / w_pair.sum()
+    eye = np.eye(D.shape[1])
+    for _ in range(iterations):
+        p = 1.0 / (1.0 + np.exp(-(D @ w)))  # P(model keeps the logged order)
+        grad = -(D.T @ (w_pair * (1.0 - p))) + l2 * w
+        hess = (D * (w_pair * p * (1.0 - p))[:, None]).T @ D + l2 * eye
+        step = np.linalg.solve(hess, grad)
+        w -= step
+        if np.abs(step).max() < 1e-6:
+            break
+    return RankingModel(w, mean, std)
+
+def pairwise_accuracy(model: RankingModel, records: List[Dict[str, Any]]) -> float:
+    D, _, _ = build_pairs(records)
+    if len(D) == 0:
+        return float("nan")
+    return float(np.mean((D / model.std) @ model.weights > 0))
+
+def load_ranker_from_config() -> Tuple[Optional[RankingModel], Dict[str, Any]]:
+    cfg = load_config("ranker")
+    if not cfg.get("enabled", True):
+        return None, cfg
+    return RankingModel.load(cfg.get("model_path", MODEL_FILE)), cfg
@@ -0,0 +1,281 @@
+import json
+import queue
+import threading
+import time
+import urllib.request
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Dict, Any, Optional
+import numpy as np
+from src.simulation.models import Task, UserProfile
+from src.config import load_config
+from src.streaming import LazyPlan
+from src.anytime import AnytimeExecutor, FallbackPlan, SourcedPlan, heuristic_plan, plan_source, run_with_deadline
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+OPS = ("plan", "replan", "critique")
+
+class _Job:
+    def __init__(self, op: str, payload: Dict[str, Any]):
+        self.op = op
+        self.payload = payload
+        self.key = (op, json.dumps(payload, sort_keys=True))
+        self.enqueued_at = time.perf_counter()
+        self.future: Future = Future()
+
+class PlanningService:
+    """
+    One long-lived process that owns the warm AgenticPlanner (LLM clients, plan cache, ranker).
+    Requests are queued and drained in micro-batches: the worker waits up to batch_window_ms
+    for more requests, collapses identical ones (byte-identical payloads) into a single backend
+    call, and runs the rest concurrently. A call is only handed to the pool once one of the
+    backend_concurrency slots is free, so waiting work stays visible in queue_depth.
+    """
+    def __init__(self, agent=None, batch_window_ms: float = 20, max_batch: int = 16, backend_concurrency: int = 4):
+        if agent is None:
+            from src.agent import AgenticPlanner
+            agent = AgenticPlanner()
+        self.agent = agent
+        self.batch_window = batch_window_ms / 1000
+        self.max_batch = max_batch
+        self.queue: "queue.Queue[_Job]" = queue.Queue()
+        self.pool = ThreadPoolExecutor(max_workers=backend_concurrency)
+        self._slots = threading.Semaphore(backend_concurrency)
+        self.latencies_ms = deque(maxlen=10000)
+        self.completed = 0
+        self.batches = 0
+        self.batched_requests = 0
+        self.deduplicated = 0
+        self.in_flight = 0
+        self.waiting = 0  # Requests taken off the queue that are still waiting for a backend slot
+        self._lock = threading.Lock()
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    def submit(self, op: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Blocking call used by the HTTP handler threads."""
+        if op not in OPS:
+            raise ValueError(f"Unknown operation '{op}'")
+        job = _Job(op, payload)
+        self.queue.put(job)
+        return job.future.result()
+
+    def _run(self):
+        while True:
+            # 1. Block for the first request, then gather more for up to batch_window
+            batch = [self.queue.get()]
+            deadline = time.perf_counter() + self.batch_window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            # 2. Identical requests share one backend call
+            groups: Dict[Any, List[_Job]] = {}
+            for job in batch:
+                groups.setdefault(job.key, []).append(job)
+
+            with self._lock:
+                self.batches += 1
+                self.batched_requests += len(batch)
+                self.deduplicated += len(batch) - len(groups)
+                self.waiting += len(batch)
+
+            for jobs in groups.values():
+                self._slots.acquire()
+                with self._lock:
+                    self.waiting -= len(jobs)
+                    self.in_flight += 1
+                self.pool.submit(self._execute, jobs)
+
+    def _execute(self, jobs: List[_Job]):
+        job = jobs[0]
+        try:
+            result, error = self._dispatch(job.op, job.payload), None
+        except Exception as e:
+            result, error = None, e
+
+        done = time.perf_counter()
+        with self._lock:
+            self.in_flight -= 1
+            for j in jobs:
+                self.completed += 1
+                self.latencies_ms.append((done - j.enqueued_at) * 1000)
+        self._slots.release()
+        for j in jobs:
+            if error is None:
+                j.future.set_result(result)
+            else:
+                j.future.set_exception(error)
+
+    def _dispatch(self, op: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        tasks = [Task(**t) for t in payload["tasks"]]
+        user = UserProfile(**payload["user"])
+        if op == "plan":
+            ordered = self.agent.plan(tasks, user, use_reflexion=payload.get("use_reflexion", True),
+                                      use_memory=payload.get("use_memory", True),
+                                      use_fast_path=payload.get("use_fast_path", True))
+            return {"ordered_task_ids": [t.id for t in ordered], "source": plan_source(ordered)}
+        if op == "replan":
+            ordered = self.agent.replan(tasks, user, payload["current_time"], payload.get("history_log", []))
+            return {"ordered_task_ids": [t.id for t in ordered], "source": plan_source(ordered)}
+        return {"feedback": self.agent.critic.critique_plan(tasks, user)}
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lat = np.array(self.latencies_ms) if self.latencies_ms else None
+            return {
+                "queue_depth": self.queue.qsize() + self.waiting,
+                "in_flight": self.in_flight,
+                "completed": self.completed,
+                "p50_ms": float(np.percentile(lat, 50)) if lat is not None else None,
+                "p99_ms": float(np.percentile(lat, 99)) if lat is not None else None,
+                "batches": self.batches,
+                "mean_batch_size": self.batched_requests / self.batches if self.batches else 0.0,
+                "deduplicated": self.deduplicated,
+                "plan_cache": self.agent.plan_cache.stats(),
+            }
+
+def _make_handler(service: PlanningService):
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, code: int, body: Dict[str, Any]):
+            data = json.dumps(body).encode()
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path == "/stats":
+                self._send(200, service.stats())
+            else:
+                self._send(404, {"error": f"Unknown path {self.path}"})
+
+        def do_POST(self):
+            op = self.path.strip("/")
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                self._send(200, service.submit(op, payload))
+            except ValueError as e:
+                self._send(400, {"error": str(e)})
+            except Exception as e:
+                self._send(500, {"error": str(e)})
+
+        def log_message(self, format, *args):
+            pass  # Keep the console for agent output
+
+    return Handler
+
+def serve(host: Optional[str] = None, port: Optional[int] = None, agent=None):
+    cfg = load_config("planning_service")
+    host = host or cfg.get("host", DEFAULT_HOST)
+    port = port or cfg.get("port", DEFAULT_PORT)
+    service = PlanningService(agent=agent,
+                              batch_window_ms=cfg.get("batch_window_ms", 20),
+                              max_batch=cfg.get("max_batch", 16),
+                              backend_concurrency=cfg.get("backend_concurrency", 4))
+    server = ThreadingHTTPServer((host, port), _make_handler(service))
+    print(f"[Planning Service]: Listening on http://{host}:{port} (POST /plan /replan /critique, GET /stats)")
+    return server, service
+
+# --- Thin client used by the scripts ---
+def _task_payload(tasks: List[Task]) -> List[Dict[str, Any]]:
+    return [t.model_dump(mode="json") for t in tasks]
+
+def _reorder(tasks: List[Task], ordered_ids: List[str]) -> List[Task]:
+    """Maps returned IDs onto the caller's own Task objects (appending any the server dropped)."""
+    task_map = {t.id: t for t in tasks}
+    ordered = [task_map[tid] for tid in ordered_ids if tid in task_map]
+    seen = {t.id for t in ordered}
+    return ordered + [t for t in tasks if t.id not in seen]
+
+def _sourced(tasks: List[Task], resp: Dict[str, Any]) -> SourcedPlan:
+    """Rebuilds the server's plan with its source tag, so a server-side fallback stays a FallbackPlan."""
+    ordered = _reorder(tasks, resp["ordered_task_ids"])
+    source = resp.get("source", "llm")
+    return FallbackPlan(ordered) if source == "fallback" else SourcedPlan(ordered, source)
+
+class RemotePlanCacheView:
+    """Gives remote callers the same plan_cache.stats()/report() interface as a local planner."""
+    def __init__(self, client: "RemotePlanner"):
+        self.client = client
+
+    def stats(self) -> Dict[str, float]:
+        return self.client.service_stats()["plan_cache"]
+
+    def report(self):
+        s = self.client.service_stats()
+        c = s["plan_cache"]
+        print(f"[Plan Cache]: {c['hits']} hits / {c['misses']} misses (hit rate {c['hit_rate']*100:.1f}%), "
+              f"{c['evictions']} evictions, {c['size']} entries")
+        p50 = f"{s['p50_ms']:.0f}ms" if s["p50_ms"] is not None else "n/a"
+        p99 = f"{s['p99_ms']:.0f}ms" if s["p99_ms"] is not None else "n/a"
+        print(f"[Planning Service]: queue depth {s['queue_depth']}, p50 {p50}, p99 {p99}, "
+              f"{s['completed']} requests in {s['batches']} batches")
+
+class RemotePlanner:
+    """Drop-in replacement for AgenticPlanner that forwards calls to a running planning service."""
+    def __init__(self, url: str, timeout: float = 300):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+        self.plan_cache = RemotePlanCacheView(self)
+        self._background = AnytimeExecutor(max_workers=load_config("anytime").get("background_workers", 2))
+
+    def _post(self, op: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        req = urllib.request.Request(f"{self.url}/{op}", data=json.dumps(payload).encode(),
+                                     headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+            return json.loads(resp.read())
+
+    def plan(self, tasks: List[Task], user: UserProfile, use_reflexion: bool = True, use_memory: bool = True,
+             deadline_ms: Optional[float] = None, use_fast_path: bool = True) -> List[Task]:
+        payload = {"tasks": _task_payload(tasks), "user": user.model_dump(),
+                   "use_reflexion": use_reflexion, "use_memory": use_memory, "use_fast_path": use_fast_path}
+
+        compute = lambda: _sourced(tasks, self._post("plan", payload))
+
+        if deadline_ms is None:
+            return compute()
+        return run_with_deadline(compute, lambda: heuristic_plan(tasks, user), deadline_ms, self._background)
+
+    def replan(self, remaining_tasks: List[Task], user: UserProfile, current_time: int, history_log: List[str],
+               deadline_ms: Optional[float] = None) -> List[Task]:
+        remaining_tasks = list(remaining_tasks)
+        payload = {"tasks": _task_payload(remaining_tasks), "user": user.model_dump(),
+                   "current_time": current_time, "history_log": list(history_log)}
+        compute = lambda: _sourced(remaining_tasks, self._post("replan", payload))
+        if deadline_ms is None:
+            return compute()
+        return run_with_deadline(compute, lambda: heuristic_plan(remaining_tasks, user), deadline_ms, self._background)
+
+    # The service answers with the complete ordering, so the "stream" is already finished on arrival.
+    def plan_stream(self, tasks: List[Task], user: UserProfile, use_reflexion: bool = True, use_memory: bool = True,
+                    use_fast_path: bool = True) -> LazyPlan:
+        ordered = self.plan(tasks, user, use_reflexion, use_memory, use_fast_path=use_fast_path)
+        return LazyPlan(iter(ordered), plan_source=ordered.source)
+
+    def replan_stream(self, remaining_tasks: List[Task], user: UserProfile, current_time: int, history_log: List[str]) -> LazyPlan:
+        ordered = self.replan(remaining_tasks, user, current_time, history_log)
+        return LazyPlan(iter(ordered), plan_source=ordered.source)
+
+    def critique_plan(self, tasks_ordered: List[Task], user: UserProfile) -> str:
+        return self._post("critique", {"tasks": _task_payload(tasks_ordered), "user": user.model_dump()})["feedback"]
+
+    def service_stats(self) -> Dict[str, Any]:
+        with urllib.request.urlopen(f"{self.url}/stats", timeout=self.timeout) as resp:
+            return json.loads(resp.read())
+
+def get_planner(server_url: Optional[str] = None):
+    """AgenticPlanner in-process, or a RemotePlanner when a planning service URL is given."""
+    if server_url:
+        return RemotePlanner(server_url)
+    from src.agent import AgenticPlanner
+    return AgenticPlanner()
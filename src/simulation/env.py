@@ -1,20 +1,43 @@
 import numpy as np
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 from .models import Task, UserProfile, TaskStatus, DailyLog
+from src.profiling import profiled
 
 class SimulationEnvironment:
-    def __init__(self, user: UserProfile):
+    def __init__(self, user: UserProfile, rng: Optional[np.random.Generator] = None):
+        """rng: private random stream (e.g. one per fleet tenant); by default the global np.random one."""
         self.user = user
+        self.rng = rng
         self.current_energy = user.daily_energy_cap
         self.current_time = user.start_hour * 60 # Convert to minutes
+        self.last_event = (0, 0, 1.0) # (actual_duration, interruption, fatigue_factor) of the last attempt
         
     def reset_day(self):
         self.current_energy = self.user.daily_energy_cap
         self.current_time = self.user.start_hour * 60
 
+    @profiled("simulate_task_execution")
     def simulate_task_execution(self, task: Task) -> Tuple[TaskStatus, str]:
         """
         Simulates executing a task. Returns status and a log message.
+        Also records the outcome on the Task (for callers that track state on the model).
+        """
+        status, msg, actual_duration = self._simulate(task.description, task.estimated_duration_mins)
+        if status == TaskStatus.COMPLETED:
+            task.actual_duration_mins = actual_duration
+            task.status = TaskStatus.COMPLETED
+        return status, msg
+
+    @profiled("simulate_task_execution")
+    def simulate_row(self, table, row: int) -> Tuple[TaskStatus, str]:
+        """Same as simulate_task_execution, but reads and writes one row of a TaskTable."""
+        status, msg, actual_duration = self._simulate(table.descriptions[row], int(table.estimated_duration_mins[row]))
+        table.set_result(row, status, actual_duration if status == TaskStatus.COMPLETED else None)
+        return status, msg
+
+    def _simulate(self, description: str, estimated_mins: int) -> Tuple[TaskStatus, str, int]:
+        """
+        Advances the clock and energy for one attempt. Returns status, log message and actual duration.
         Uses probabilistic distributions for realism.
         """
         # 1. Check Fatigue: If energy is low, tasks take longer
@@ -22,35 +45,36 @@ class SimulationEnvironment:
         if self.current_energy < 30:
             fatigue_factor = 1.5  # 50% slower when tired
             
+        rng = np.random if self.rng is None else self.rng
+
         # 2. Calculate Actual Duration (Log-Normal Distribution)
         # We assume estimation is imperfect.
-        mu = np.log(task.estimated_duration_mins)
+        mu = np.log(estimated_mins)
         sigma = 0.2 # Variance in how long tasks take
-        actual_duration = int(np.random.lognormal(mu, sigma) * self.user.work_speed_multiplier * fatigue_factor)
+        actual_duration = int(rng.lognormal(mu, sigma) * self.user.work_speed_multiplier * fatigue_factor)
         
         # 3. Check for Random Interruptions (Poisson process approximation)
         interruption_prob = 0.15
         interruption_duration = 0
-        if np.random.random() < interruption_prob:
-            interruption_duration = np.random.randint(15, 60)
+        if rng.random() < interruption_prob:
+            interruption_duration = np.random.randint(15, 60) if self.rng is None else int(self.rng.integers(15, 60))
             
         total_time_cost = actual_duration + interruption_duration
+        self.last_event = (actual_duration, interruption_duration, fatigue_factor)
         
         # 4. Validate against Day Constraints
         day_end_mins = self.user.end_hour * 60
         if self.current_time + total_time_cost > day_end_mins:
-            return TaskStatus.FAILED, f"Ran out of time. Required {total_time_cost}m, but day ends in {day_end_mins - self.current_time}m."
+            return TaskStatus.FAILED, f"Ran out of time. Required {total_time_cost}m, but day ends in {day_end_mins - self.current_time}m.", actual_duration
             
         # 5. Execute
         self.current_time += total_time_cost
         self.current_energy -= (10 * fatigue_factor) # Energy drain
-        task.actual_duration_mins = actual_duration
-        task.status = TaskStatus.COMPLETED
         
-        log_msg = f"Task '{task.description}' done in {actual_duration}m (Est: {task.estimated_duration_mins}m)."
+        log_msg = f"Task '{description}' done in {actual_duration}m (Est: {estimated_mins}m)."
         if interruption_duration > 0:
             log_msg += f" + {interruption_duration}m interruption."
         if fatigue_factor > 1.0:
             log_msg += " (User was tired)."
             
-        return TaskStatus.COMPLETED, log_msg
\ No newline at end of file
+        return TaskStatus.COMPLETED, log_msg, actual_duration
\ No newline at end of file
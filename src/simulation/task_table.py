@@ -0,0 +1,121 @@
+import numpy as np
+import pandas as pd
+from typing import List, Dict, Iterable, Optional, Tuple
+from .models import Task, TaskStatus
+from .trace import STATUS_CODES
+
+NO_DURATION = -1  # actual_duration_mins of a task that has not been completed
+
+class TaskTable:
+    """
+    Compact execution state for one set of tasks, one NumPy array per field.
+    The pydantic Task stays the I/O schema (prompts, UI, service); status and actual
+    duration live here, so running an episode never mutates or re-validates Task objects.
+
+    Rows are positions in the original task list. frame() wraps the arrays without copying,
+    and snapshot()/restore() copy only the two mutable columns, for cheap replanning what-ifs.
+    """
+    def __init__(self, ids: List[str], descriptions: List[str], durations: np.ndarray, priorities: np.ndarray,
+                 deadlines: np.ndarray, dependencies: Optional[List[List[str]]] = None):
+        n = len(ids)
+        self.ids = ids
+        self.descriptions = descriptions
+        self.dependencies = dependencies if dependencies is not None else [[] for _ in range(n)]
+        self.estimated_duration_mins = np.asarray(durations, dtype=np.int32)
+        self.priority = np.asarray(priorities, dtype=np.int8)
+        self.deadline_day = np.asarray(deadlines, dtype=np.int16)
+        self.status = np.zeros(n, dtype=np.int8)  # Index into STATUS_CODES (0 = pending)
+        self.actual_duration_mins = np.full(n, NO_DURATION, dtype=np.int32)
+        self._index: Dict[str, int] = {tid: i for i, tid in enumerate(ids)}
+
+    @classmethod
+    def from_tasks(cls, tasks: List[Task]) -> "TaskTable":
+        table = cls([t.id for t in tasks], [t.description for t in tasks],
+                    [t.estimated_duration_mins for t in tasks], [t.priority for t in tasks],
+                    [t.deadline_day for t in tasks], [list(t.dependencies) for t in tasks])
+        for i, t in enumerate(tasks):
+            if t.status != TaskStatus.PENDING:
+                table.status[i] = STATUS_CODES.index(t.status)
+            if t.actual_duration_mins is not None:
+                table.actual_duration_mins[i] = t.actual_duration_mins
+        return table
+
+    @classmethod
+    def from_batch(cls, batch, episode: int) -> "TaskTable":
+        """Straight from WorkloadBatch columns: no Task objects are built."""
+        from .workload import format_task_id
+        s = batch.episode_slice(episode)
+        rows = batch.task_ids[s].tolist()
+        verbs, nouns = batch.verb_idx[s].tolist(), batch.noun_idx[s].tolist()
+        deps = {row: [] for row in rows}
+        src, dst = batch.episode_dependencies(episode)
+        for a, b in zip(src.tolist(), dst.tolist()):
+            deps[b].append(format_task_id(a))
+        return cls([format_task_id(r) for r in rows],
+                   [f"{batch.verbs[verbs[i]]} {batch.nouns[nouns[i]]} {i+1}" for i in range(len(rows))],
+                   batch.durations[s], batch.priorities[s], batch.deadlines[s], [deps[r] for r in rows])
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def row(self, task_id: str) -> int:
+        return self._index[task_id]
+
+    def rows(self, task_ids: Iterable[str]) -> np.ndarray:
+        return np.fromiter((self._index[tid] for tid in task_ids), dtype=np.int64)
+
+    def set_result(self, row: int, status: TaskStatus, actual_duration: Optional[int] = None):
+        self.status[row] = STATUS_CODES.index(status)
+        if actual_duration is not None:
+            self.actual_duration_mins[row] = actual_duration
+
+    def status_of(self, row: int) -> TaskStatus:
+        return STATUS_CODES[self.status[row]]
+
+    def pending_rows(self) -> np.ndarray:
+        return np.flatnonzero(self.status == 0)
+
+    # --- Snapshots (what-if replanning) ---
+    def snapshot(self) -> Tuple[np.ndarray, np.ndarray]:
+        return self.status.copy(), self.actual_duration_mins.copy()
+
+    def restore(self, snapshot: Tuple[np.ndarray, np.ndarray]):
+        """In place, so frames and other views over the table stay valid."""
+        self.status[:], self.actual_duration_mins[:] = snapshot
+
+    # --- Views / conversion ---
+    def frame(self, rows: Optional[np.ndarray] = None) -> pd.DataFrame:
+        """
+        DataFrame for display. Without `rows` every numeric column is a view of the table's
+        arrays (no copy); with `rows` (e.g. the pending order) only those rows are gathered.
+        """
+        columns = {
+            "id": self.ids,
+            "description": self.descriptions,
+            "estimated_duration_mins": self.estimated_duration_mins,
+            "priority": self.priority,
+            "deadline_day": self.deadline_day,
+            "status": pd.Categorical.from_codes(self.status, categories=[s.value for s in STATUS_CODES]),
+            "actual_duration_mins": self.actual_duration_mins,
+        }
+        if rows is None:
+            return pd.DataFrame(columns, copy=False)
+        rows = np.asarray(rows, dtype=np.int64)
+        return pd.DataFrame({name: np.asarray(col)[rows] if not isinstance(col, pd.Categorical) else col[rows]
+                             for name, col in columns.items()})
+
+    def to_task(self, row: int) -> Task:
+        actual = int(self.actual_duration_mins[row])
+        return Task.model_construct(
+            id=self.ids[row],
+            description=self.descriptions[row],
+            estimated_duration_mins=int(self.estimated_duration_mins[row]),
+            deadline_day=int(self.deadline_day[row]),
+            priority=int(self.priority[row]),
+            dependencies=list(self.dependencies[row]),
+            status=self.status_of(row),
+            actual_duration_mins=None if actual == NO_DURATION else actual,
+        )
+
+    def to_tasks(self, rows: Optional[Iterable[int]] = None) -> List[Task]:
+        return [self.to_task(int(r)) for r in (range(len(self)) if rows is None else rows)]
@@ -0,0 +1,142 @@
+import json
+import os
+import numpy as np
+import pandas as pd
+from typing import Iterator, Optional
+from .models import TaskStatus
+
+TRACE_DIR = "data/traces"
+EVENTS_FILE = "events.bin"
+INDEX_FILE = "episodes.idx"
+META_FILE = "meta.json"
+
+# One fixed-width (27-byte, packed) record per task execution attempt.
+EVENT_DTYPE = np.dtype([
+    ("episode", "<u4"),
+    ("task", "<u4"),          # Compact task ID (row in the workload batch, or position in the episode)
+    ("duration", "<i4"),      # Actual minutes spent on the task itself
+    ("interruption", "<i2"),  # Minutes lost to a random interruption
+    ("fatigue", "<f4"),       # Fatigue factor applied (1.0 = rested)
+    ("time", "<i4"),          # Clock (minutes since midnight) after the attempt
+    ("energy", "<f4"),        # Energy after the attempt
+    ("status", "u1"),         # Index into STATUS_CODES
+])
+INDEX_DTYPE = np.dtype([("episode", "<u4"), ("offset", "<i8"), ("count", "<u4")])
+STATUS_CODES = [TaskStatus.PENDING, TaskStatus.COMPLETED, TaskStatus.FAILED, TaskStatus.DELAYED]
+
+class TraceWriter:
+    """
+    Appends execution events to <trace_dir>/events.bin and one index row per episode to
+    <trace_dir>/episodes.idx. Events are buffered and written in large chunks.
+    """
+    def __init__(self, trace_dir: str, resume_at: Optional[dict] = None, flush_every: int = 65536):
+        self.trace_dir = trace_dir
+        self.flush_every = flush_every
+        os.makedirs(trace_dir, exist_ok=True)
+        self.events_path = os.path.join(trace_dir, EVENTS_FILE)
+        self.index_path = os.path.join(trace_dir, INDEX_FILE)
+
+        if resume_at is None:
+            # Fresh trace
+            open(self.events_path, 'wb').close()
+            open(self.index_path, 'wb').close()
+            self.num_events = 0
+        else:
+            # Drop anything written after the last checkpoint (see position())
+            self.num_events = resume_at["num_events"]
+            with open(self.events_path, 'r+b') as f:
+                f.truncate(self.num_events * EVENT_DTYPE.itemsize)
+            with open(self.index_path, 'r+b') as f:
+                f.truncate(resume_at["num_episodes"] * INDEX_DTYPE.itemsize)
+
+        self.num_episodes = os.path.getsize(self.index_path) // INDEX_DTYPE.itemsize
+        self._events = []
+        self._index = []
+        self._episode = None
+        self._episode_start = 0
+        with open(os.path.join(trace_dir, META_FILE), 'w') as f:
+            json.dump({"event_dtype": EVENT_DTYPE.descr, "index_dtype": INDEX_DTYPE.descr,
+                       "status_codes": [s.value for s in STATUS_CODES]}, f, indent=2)
+
+    def begin_episode(self, episode: int):
+        self._episode = episode
+        self._episode_start = self.num_events
+
+    def record(self, task: int, status: TaskStatus, env):
+        """Logs the attempt the environment just simulated (reads env.last_event and its clock/energy)."""
+        duration, interruption, fatigue = env.last_event
+        self._events.append((self._episode, task, duration, interruption, fatigue,
+                             env.current_time, env.current_energy, STATUS_CODES.index(status)))
+        self.num_events += 1
+
+    def end_episode(self):
+        self._index.append((self._episode, self._episode_start, self.num_events - self._episode_start))
+        self.num_episodes += 1
+        if len(self._events) >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        if self._events:
+            with open(self.events_path, 'ab') as f:
+                np.array(self._events, dtype=EVENT_DTYPE).tofile(f)
+            self._events = []
+        if self._index:
+            with open(self.index_path, 'ab') as f:
+                np.array(self._index, dtype=INDEX_DTYPE).tofile(f)
+            self._index = []
+
+    def position(self) -> dict:
+        """Flushes and returns the committed sizes (store this in a checkpoint to resume later)."""
+        self.flush()
+        return {"num_events": self.num_events, "num_episodes": self.num_episodes}
+
+    def close(self):
+        self.flush()
+
+class TraceReader:
+    """
+    Memory-mapped, read-only view of a trace. Nothing is loaded until it is touched:
+    episode() returns a slice of the mapping, column() a strided view over one field.
+    """
+    def __init__(self, trace_dir: str = TRACE_DIR):
+        events_path = os.path.join(trace_dir, EVENTS_FILE)
+        index_path = os.path.join(trace_dir, INDEX_FILE)
+        self.events = self._map(events_path, EVENT_DTYPE)
+        self.index = self._map(index_path, INDEX_DTYPE)
+
+    @staticmethod
+    def _map(path: str, dtype: np.dtype) -> np.ndarray:
+        if os.path.getsize(path) == 0:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode="r")
+
+    @property
+    def num_events(self) -> int:
+        return len(self.events)
+
+    @property
+    def num_episodes(self) -> int:
+        return len(self.index)
+
+    def episode(self, episode: int) -> np.ndarray:
+        """All events of one episode (episodes are written in increasing order, so this is a binary search)."""
+        i = int(np.searchsorted(self.index["episode"], episode))
+        if i >= len(self.index) or self.index["episode"][i] != episode:
+            raise KeyError(f"Episode {episode} not in trace")
+        offset, count = int(self.index["offset"][i]), int(self.index["count"][i])
+        return self.events[offset:offset + count]
+
+    def episode_frame(self, episode: int) -> pd.DataFrame:
+        df = pd.DataFrame(np.asarray(self.episode(episode)))
+        df["status"] = [STATUS_CODES[s].value for s in df["status"]]
+        return df
+
+    def column(self, name: str) -> np.ndarray:
+        """Strided view of one field across every event (pages are read lazily by the OS)."""
+        return self.events[name]
+
+    def scan(self, name: str, chunk_size: int = 1 << 20) -> Iterator[np.ndarray]:
+        """Yields one column in contiguous chunks, for aggregations with bounded memory."""
+        col = self.column(name)
+        for start in range(0, len(col), chunk_size):
+            yield np.asarray(col[start:start + chunk_size])
@@ -0,0 +1,174 @@
+import numpy as np
+from typing import List, Dict, Any, Optional
+from .models import Task
+from src.config import load_config
+
+# Used when config.yaml has no 'workload' section (same distribution as the original generator).
+DEFAULT_VERBS = ["Read", "Write", "Code", "Review", "Email", "Debug"]
+DEFAULT_NOUNS = ["Paper", "Report", "Module", "Notes", "Professor", "Script"]
+DEFAULT_SCENARIO = {
+    "num_tasks": [4, 8],
+    "durations": [30, 45, 60, 90, 120],
+    "duration_weights": None,
+    "priorities": [1],
+    "priority_weights": None,
+    "deadline_days": [1],
+    "dependency_prob": 0.0,
+    "user_speed": [0.8, 1.2],
+}
+
+def load_scenario(name: Optional[str] = None) -> Dict[str, Any]:
+    """Returns the named scenario from config.yaml, filled in with defaults."""
+    cfg = load_config("workload")
+    name = name or cfg.get("default_scenario", "baseline")
+    scenarios = cfg.get("scenarios") or {}
+
+    if scenarios and name not in scenarios:
+        raise ValueError(f"Unknown workload scenario '{name}'. Available: {sorted(scenarios)}")
+
+    scenario = dict(DEFAULT_SCENARIO)
+    scenario.update(scenarios.get(name) or {})
+    scenario["name"] = name
+    return scenario
+
+_default_rng: Optional[np.random.Generator] = None
+
+def _shared_rng() -> np.random.Generator:
+    """
+    Process-wide generator seeded once from workload.seed, for calls without an explicit rng.
+    Successive calls keep advancing it, so a fixed seed gives a reproducible sequence of
+    different task lists rather than the same list every time.
+    """
+    global _default_rng
+    if _default_rng is None:
+        _default_rng = np.random.default_rng(load_config("workload").get("seed"))
+    return _default_rng
+
+def format_task_id(task_id: int) -> str:
+    """Compact integer ID -> the string ID shown to the LLM and the UI."""
+    return f"t{task_id:04d}"
+
+def _normalize(weights, n):
+    if weights is None:
+        return None
+    w = np.asarray(weights, dtype=np.float64)
+    if len(w) != n:
+        raise ValueError(f"Expected {n} weights, got {len(w)}")
+    return w / w.sum()
+
+class WorkloadBatch:
+    """
+    Columnar batch of synthetic episodes.
+    Tasks of episode e live in rows [episode_offsets[e], episode_offsets[e+1]) of every task column.
+    Dependencies are stored as an edge list of global row indices (dep_dst depends on dep_src).
+    """
+    def __init__(self, episode_offsets, durations, priorities, deadlines, verb_idx, noun_idx,
+                 dep_src, dep_dst, user_speed, verbs, nouns, scenario):
+        self.episode_offsets = episode_offsets
+        self.task_ids = np.arange(len(durations), dtype=np.int32)
+        self.durations = durations
+        self.priorities = priorities
+        self.deadlines = deadlines
+        self.verb_idx = verb_idx
+        self.noun_idx = noun_idx
+        self.dep_src = dep_src
+        self.dep_dst = dep_dst
+        self.user_speed = user_speed
+        self.verbs = verbs
+        self.nouns = nouns
+        self.scenario = scenario
+
+    @property
+    def num_episodes(self) -> int:
+        return len(self.episode_offsets) - 1
+
+    @property
+    def num_tasks(self) -> int:
+        return len(self.durations)
+
+    def episode_slice(self, episode: int) -> slice:
+        return slice(int(self.episode_offsets[episode]), int(self.episode_offsets[episode + 1]))
+
+    def episode_dependencies(self, episode: int):
+        """Returns (src, dst) edge arrays whose rows belong to this episode."""
+        s = self.episode_slice(episode)
+        # Edges are generated in row order, so each episode's edges are contiguous.
+        lo, hi = np.searchsorted(self.dep_dst, [s.start, s.stop])
+        return self.dep_src[lo:hi], self.dep_dst[lo:hi]
+
+    def materialize(self, episode: int) -> List[Task]:
+        """
+        Builds pydantic Task objects for one episode.
+        Only call this when something needs real Task objects (LLM prompt, UI, env).
+        The columns are already typed and in range, so validation is skipped.
+        """
+        s = self.episode_slice(episode)
+        ids = self.task_ids[s].tolist()
+        durations = self.durations[s].tolist()
+        priorities = self.priorities[s].tolist()
+        deadlines = self.deadlines[s].tolist()
+        verbs = self.verb_idx[s].tolist()
+        nouns = self.noun_idx[s].tolist()
+
+        deps = {tid: [] for tid in ids}
+        src, dst = self.episode_dependencies(episode)
+        for a, b in zip(src.tolist(), dst.tolist()):
+            deps[b].append(format_task_id(a))
+
+        return [
+            Task.model_construct(
+                id=format_task_id(ids[i]),
+                description=f"{self.verbs[verbs[i]]} {self.nouns[nouns[i]]} {i+1}",
+                estimated_duration_mins=durations[i],
+                deadline_day=deadlines[i],
+                priority=priorities[i],
+                dependencies=deps[ids[i]],
+            )
+            for i in range(len(ids))
+        ]
+
+def generate_workload(num_episodes: int, scenario: Optional[str] = None, num_tasks: Optional[int] = None,
+                      rng: Optional[np.random.Generator] = None) -> WorkloadBatch:
+    """
+    Draws a whole batch of episodes at once as NumPy columns.
+    num_tasks overrides the scenario's per-episode task range with a fixed count.
+    """
+    cfg = load_config("workload")
+    spec = load_scenario(scenario)
+    if rng is None:
+        rng = _shared_rng()
+    verbs = cfg.get("verbs") or DEFAULT_VERBS
+    nouns = cfg.get("nouns") or DEFAULT_NOUNS
+
+    # 1. Episode sizes -> CSR offsets
+    if num_tasks is not None:
+        counts = np.full(num_episodes, num_tasks, dtype=np.int64)
+    else:
+        lo, hi = spec["num_tasks"]
+        counts = rng.integers(lo, hi + 1, size=num_episodes)
+    offsets = np.zeros(num_episodes + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    total = int(offsets[-1])
+
+    # 2. Task attributes
+    durations = rng.choice(np.asarray(spec["durations"], dtype=np.int32), size=total,
+                           p=_normalize(spec["duration_weights"], len(spec["durations"])))
+    priorities = rng.choice(np.asarray(spec["priorities"], dtype=np.int8), size=total,
+                            p=_normalize(spec["priority_weights"], len(spec["priorities"])))
+    deadlines = rng.choice(np.asarray(spec["deadline_days"], dtype=np.int16), size=total)
+    verb_idx = rng.integers(0, len(verbs), size=total, dtype=np.int8)
+    noun_idx = rng.integers(0, len(nouns), size=total, dtype=np.int8)
+
+    # 3. Dependencies: each task may depend on one earlier task of the same episode (keeps it a DAG)
+    local_pos = np.arange(total, dtype=np.int64) - np.repeat(offsets[:-1], counts)
+    has_dep = (rng.random(total) < spec["dependency_prob"]) & (local_pos > 0)
+    dep_dst = np.flatnonzero(has_dep).astype(np.int32)
+    back = (rng.random(len(dep_dst)) * local_pos[dep_dst]).astype(np.int32) + 1
+    dep_src = dep_dst - back
+
+    # 4. Per-episode user
+    speed_lo, speed_hi = spec["user_speed"]
+    user_speed = rng.uniform(speed_lo, speed_hi, size=num_episodes)
+
+    return WorkloadBatch(offsets, durations, priorities, deadlines, verb_idx, noun_idx,
+                         dep_src, dep_dst, user_speed, verbs, nouns, spec["name"])
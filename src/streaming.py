@@ -0,0 +1,151 @@
+import json
+from typing import Iterator, List, Optional, Callable, Any
+
+class IncrementalPlanParser:
+    """
+    Character-level JSON scanner that emits the entries of one array field
+    (default: "ordered_task_ids") the moment each string is closed, long before the
+    whole response has arrived. Markdown fences or other text outside the top-level
+    object are skipped. The full text is kept so the complete object can be parsed at the end.
+    """
+    def __init__(self, field: str = "ordered_task_ids"):
+        self.field = field
+        self.text_parts: List[str] = []
+        self._stack: List[dict] = []   # {"type": "obj"|"arr", "key": field name in parent, "expect_key": bool}
+        self._pending_key: Optional[str] = None
+        self._in_string = False
+        self._escape = False
+        self._buf: List[str] = []
+        self._done = False
+
+    def feed(self, chunk: str) -> List[str]:
+        """Consumes the next chunk of model output and returns any newly completed array entries."""
+        self.text_parts.append(chunk)
+        found = []
+        for ch in chunk:
+            if self._done:
+                break
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                    self._buf.append(ch)
+                elif ch == "\\":
+                    self._escape = True
+                    self._buf.append(ch)
+                elif ch == '"':
+                    self._in_string = False
+                    value = json.loads('"' + "".join(self._buf) + '"')
+                    self._on_string(value, found)
+                else:
+                    self._buf.append(ch)
+                continue
+
+            if not self._stack and ch != "{":
+                continue  # Fences / prose before the object
+            if ch == '"':
+                self._in_string = True
+                self._buf = []
+            elif ch in "{[":
+                self._stack.append({"type": "obj" if ch == "{" else "arr", "key": self._pending_key,
+                                    "expect_key": ch == "{"})
+                self._pending_key = None
+            elif ch in "}]":
+                self._stack.pop()
+                self._pending_key = None
+                if not self._stack:
+                    self._done = True
+            elif ch == ",":
+                top = self._stack[-1]
+                if top["type"] == "obj":
+                    top["expect_key"] = True
+                    self._pending_key = None
+        return found
+
+    def _on_string(self, value: str, found: List[str]):
+        top = self._stack[-1]
+        if top["type"] == "obj" and top["expect_key"]:
+            self._pending_key = value
+            top["expect_key"] = False
+        elif top["type"] == "arr" and top["key"] == self.field and len(self._stack) == 2:
+            found.append(value)
+
+    @property
+    def text(self) -> str:
+        return "".join(self.text_parts)
+
+class LazyPlan:
+    """
+    List-like plan that is filled from a generator as the LLM streams task IDs.
+    The execution loops only touch pending[0] / pop(0) / truthiness, which pull just
+    enough items, so the first task can start while the rest is still being generated.
+    len(), slicing and iteration to the end drain the stream.
+    on_complete receives the full plan once the stream ends, unless the source generator
+    returns False (its items are a fallback, e.g. the LLM call failed; `source` then becomes 'fallback').
+    `source` tags the producing path the same way as SourcedPlan.source.
+    """
+    def __init__(self, source: Iterator[Any], on_complete: Optional[Callable[[List[Any]], None]] = None,
+                 plan_source: str = "llm"):
+        self.source = plan_source
+        self._source = source
+        self._items: List[Any] = []
+        self._all: List[Any] = []
+        self._on_complete = on_complete
+        self._exhausted = False
+
+    def _pull(self, n: Optional[int] = None) -> bool:
+        while not self._exhausted and (n is None or len(self._items) < n):
+            try:
+                item = next(self._source)
+            except StopIteration as stop:
+                self._exhausted = True
+                if stop.value is False:
+                    self.source = "fallback"
+                elif self._on_complete:
+                    self._on_complete(list(self._all))
+                break
+            self._items.append(item)
+            self._all.append(item)
+        return self._exhausted
+
+    def drain(self) -> List[Any]:
+        self._pull()
+        return self._items
+
+    def ordered(self) -> List[Any]:
+        """The complete plan as originally produced (including items already popped)."""
+        self._pull()
+        return list(self._all)
+
+    def __bool__(self) -> bool:
+        self._pull(1)
+        return bool(self._items)
+
+    def __len__(self) -> int:
+        return len(self.drain())
+
+    def __getitem__(self, index):
+        if isinstance(index, int) and index >= 0:
+            self._pull(index + 1)
+        else:
+            self.drain()
+        return self._items[index]
+
+    def __iter__(self):
+        i = 0
+        while True:
+            self._pull(i + 1)
+            if i >= len(self._items):
+                return
+            yield self._items[i]
+            i += 1
+
+    def pop(self, index: int = -1):
+        if index >= 0:
+            self._pull(index + 1)
+        else:
+            self.drain()
+        return self._items.pop(index)
+
+    def __repr__(self) -> str:
+        state = "complete" if self._exhausted else "streaming"
+        return f"LazyPlan({self._items!r}, {state})"
@@ -0,0 +1,239 @@
+import glob
+import hashlib
+import itertools
+import json
+import os
+import numpy as np
+import pandas as pd
+from typing import List, Dict, Any, Optional, Sequence
+from src.simulation.models import UserProfile
+from src.simulation.workload import generate_workload
+from src.config import load_config
+from src.ranker import MODEL_FILE
+
+SWEEP_DIR = "data/sweeps"
+CELL_CACHE_DIR = "data/sweeps/cells"
+# Bump when run_episode / the simulator changes meaning, so stale cells are not reused.
+SWEEP_VERSION = 2
+
+# UserProfile fields the simulator actually reads (procrastination_prob and focus_decay_rate are not
+# modelled by SimulationEnvironment, so sweeping them would only show noise)
+PARAMS = ["work_speed_multiplier", "daily_energy_cap"]
+INT_PARAMS = {"daily_energy_cap"}
+METRICS = ["success_rate", "energy_left", "tasks_completed"]
+
+# --- Sampling ---
+def _coerce(name: str, value) -> Any:
+    return int(round(value)) if name in INT_PARAMS else round(float(value), 6)
+
+def grid_points(grid: Dict[str, Sequence]) -> List[Dict[str, Any]]:
+    """Cartesian product of the listed values (parameters not listed keep their UserProfile default)."""
+    names = [p for p in PARAMS if p in grid]
+    return [{n: _coerce(n, v) for n, v in zip(names, values)}
+            for values in itertools.product(*(grid[n] for n in names))]
+
+def latin_hypercube(ranges: Dict[str, Sequence[float]], n: int, rng: Optional[np.random.Generator] = None) -> List[Dict[str, Any]]:
+    """
+    n points where every parameter's [low, high] range is split into n strata and each stratum
+    is used exactly once, so a few dozen cells cover the space far better than a coarse grid.
+    """
+    rng = rng or np.random.default_rng()
+    names = [p for p in PARAMS if p in ranges]
+    points = [{} for _ in range(n)]
+    for name in names:
+        low, high = ranges[name]
+        u = (rng.permutation(n) + rng.random(n)) / n
+        for point, value in zip(points, low + u * (high - low)):
+            point[name] = _coerce(name, value)
+    return points
+
+# --- Content-addressed cell cache ---
+def cell_seed(seed: int, num_tasks: int) -> int:
+    """
+    Same workload and simulator draws for every cell and agent (common random numbers), so
+    differences across the grid come from the parameters, not from luck.
+    """
+    blob = json.dumps({"seed": seed, "num_tasks": num_tasks}, sort_keys=True)
+    return int(hashlib.sha256(blob.encode()).hexdigest()[:8], 16)
+
+def planner_config(agent: str, server_url: Optional[str] = None) -> Dict[str, Any]:
+    """Settings that change an agent's plans (LLM model, ranker weights, reflexion budget), for cell_key."""
+    if agent != "llm":
+        return {}
+    ranker = load_config("ranker")
+    model_path = ranker.get("model_path", MODEL_FILE)
+    model_digest = None
+    if ranker.get("enabled", True) and os.path.exists(model_path):
+        with open(model_path, 'rb') as f:
+            model_digest = hashlib.sha256(f.read()).hexdigest()
+    return {
+        "llm_model": os.getenv("GEMINI_MODEL_NAME"),
+        "ranker": {"enabled": ranker.get("enabled", True), "model": model_digest,
+                   "confidence_threshold": ranker.get("confidence_threshold")},
+        "reflexion": load_config("reflexion"),
+        "server_url": server_url,
+    }
+
+def cell_key(params: Dict[str, Any], agent: str, episodes: int, seed: int, num_tasks: int,
+             planner: Optional[Dict[str, Any]] = None) -> str:
+    blob = json.dumps({"version": SWEEP_VERSION, "params": params, "agent": agent, "episodes": episodes,
+                       "seed": seed, "num_tasks": num_tasks, "planner": planner or {}}, sort_keys=True)
+    return hashlib.sha256(blob.encode()).hexdigest()
+
+class CellCache:
+    """One JSON file per (params, agent, episodes, seed) cell: <root>/<key[:2]>/<key>.json"""
+    def __init__(self, root: str = CELL_CACHE_DIR):
+        self.root = root
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], f"{key}.json")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self.path(key)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r') as f:
+            return json.load(f)
+
+    def put(self, key: str, cell: Dict[str, Any]):
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(cell, f)
+        os.replace(tmp_path, path)
+
+# --- Result cube ---
+class ResultCube:
+    """
+    Per-cell results as a tidy frame (one row per agent x cell, with mean/std of every metric)
+    that can be viewed as a dense array over the swept parameters or sliced into 2D heatmaps.
+    """
+    def __init__(self, frame: pd.DataFrame):
+        self.frame = frame
+        self.params = [p for p in PARAMS if p in frame.columns]
+
+    @property
+    def agents(self) -> List[str]:
+        return sorted(self.frame["agent"].unique())
+
+    def axes(self) -> Dict[str, np.ndarray]:
+        return {p: np.sort(self.frame[p].unique()) for p in self.params}
+
+    def to_array(self, metric: str) -> np.ndarray:
+        """Dense array with axes (agent, *params); cells that were not run are NaN."""
+        axes = self.axes()
+        index = pd.MultiIndex.from_product([self.agents] + [axes[p] for p in self.params], names=["agent"] + self.params)
+        values = self.frame.groupby(["agent"] + self.params)[metric].mean().reindex(index)
+        return values.to_numpy().reshape([len(self.agents)] + [len(axes[p]) for p in self.params])
+
+    def heatmap(self, metric: str, x: str, y: str, agent: Optional[str] = None, fixed: Optional[Dict[str, Any]] = None,
+                bins: Optional[int] = None) -> pd.DataFrame:
+        """
+        2D slice (rows = y, columns = x). Other parameters are pinned by `fixed` or averaged over.
+        agent=None compares agents: the last agent minus the first in sorted order (e.g. llm - greedy).
+        bins groups continuous values (Latin-hypercube sweeps) into equal-width buckets.
+        """
+        df = self.frame
+        for name, value in (fixed or {}).items():
+            df = df[np.isclose(df[name], value)]
+        df = df.copy()
+        if bins:
+            for axis in (x, y):
+                df[axis] = pd.cut(df[axis], bins).apply(lambda iv: round(iv.mid, 3)).astype(float)
+
+        def pivot(frame):
+            return frame.pivot_table(index=y, columns=x, values=metric, aggfunc="mean").sort_index(ascending=False)
+
+        if agent is not None:
+            return pivot(df[df["agent"] == agent])
+        last_agent, first_agent = self.agents[-1], self.agents[0]
+        return pivot(df[df["agent"] == last_agent]) - pivot(df[df["agent"] == first_agent])
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.frame.to_csv(path, index=False)
+
+    @classmethod
+    def load(cls, path: str) -> "ResultCube":
+        return cls(pd.read_csv(path))
+
+def list_cubes(root: str = SWEEP_DIR) -> List[str]:
+    return sorted(glob.glob(os.path.join(root, "*.csv")))
+
+# --- Engine ---
+class SweepEngine:
+    """
+    Runs `episodes` episodes per (cell, agent) and caches every finished cell by content hash,
+    so re-running with a larger grid or more LHS points only computes the new cells.
+    """
+    def __init__(self, agents: Sequence[str] = ("greedy",), episodes: int = 20, seed: int = 0, num_tasks: int = 6,
+                 cache_dir: str = CELL_CACHE_DIR, server_url: Optional[str] = None):
+        self.agents = list(agents)
+        self.episodes = episodes
+        self.seed = seed
+        self.num_tasks = num_tasks
+        self.cache = CellCache(cache_dir)
+        self.server_url = server_url
+        self._planner = None
+
+    @classmethod
+    def from_config(cls, **overrides) -> "SweepEngine":
+        cfg = load_config("sweep")
+        kwargs = {
+            "agents": cfg.get("agents", ["greedy"]),
+            "episodes": cfg.get("episodes_per_cell", 20),
+            "seed": cfg.get("seed", 0),
+            "num_tasks": cfg.get("num_tasks", 6),
+            "cache_dir": cfg.get("cache_dir", CELL_CACHE_DIR),
+        }
+        kwargs.update({k: v for k, v in overrides.items() if v is not None})
+        return cls(**kwargs)
+
+    def _get_planner(self):
+        if self._planner is None:
+            from src.service import get_planner
+            self._planner = get_planner(self.server_url)
+        return self._planner
+
+    def run_cell(self, params: Dict[str, Any], agent_type: str) -> List[Dict[str, Any]]:
+        from evaluate_models import run_episode
+
+        seed = cell_seed(self.seed, self.num_tasks)
+        batch = generate_workload(self.episodes, num_tasks=self.num_tasks, rng=np.random.default_rng(seed))
+        np.random.seed(seed)
+        planner = self._get_planner() if agent_type == "llm" else None
+        user = UserProfile(**params)
+        # Sweep users are synthetic, so their plans stay out of the ranker training log
+        return [run_episode(agent_type, planner, tasks=batch.materialize(i), user=user, log_plans=False)
+                for i in range(self.episodes)]
+
+    def run(self, points: List[Dict[str, Any]]) -> ResultCube:
+        rows, hits = [], 0
+        total = len(points) * len(self.agents)
+        for agent_type in self.agents:
+            planner = planner_config(agent_type, self.server_url)
+            for params in points:
+                key = cell_key(params, agent_type, self.episodes, self.seed, self.num_tasks, planner)
+                cell = self.cache.get(key)
+                if cell is None:
+                    records = self.run_cell(params, agent_type)
+                    cell = {"params": params, "agent": agent_type, "episodes": self.episodes,
+                            "seed": self.seed, "num_tasks": self.num_tasks, "records": records}
+                    self.cache.put(key, cell)
+                    print(f"[Sweep]: {agent_type} {params} -> "
+                          f"{np.mean([r['success_rate'] for r in records])*100:.0f}% success")
+                else:
+                    hits += 1
+                rows.append(self._summarize(cell, key))
+        print(f"[Sweep]: {total} cells ({hits} from cache, {total - hits} computed)")
+        return ResultCube(pd.DataFrame(rows))
+
+    @staticmethod
+    def _summarize(cell: Dict[str, Any], key: str) -> Dict[str, Any]:
+        records = pd.DataFrame(cell["records"])
+        row = {"agent": cell["agent"], **cell["params"], "episodes": len(records), "cell": key[:12]}
+        for metric in METRICS:
+            row[metric] = records[metric].mean()
+            row[f"{metric}_std"] = records[metric].std(ddof=1) if len(records) > 1 else 0.0
+        return row
@@ -0,0 +1,68 @@
+import argparse
+import time
+import numpy as np
+from src.ranker import load_plan_log, train, pairwise_accuracy, PLAN_LOG_FILE, MODEL_FILE, FEATURE_NAMES
+from src.simulation.models import Task, UserProfile
+
+DEFAULT_SOURCES = ["llm"]
+
+def main(log_path=PLAN_LOG_FILE, model_path=MODEL_FILE, sources=None, holdout=0.2, iterations=25, seed=0,
+         outcomes=True):
+    """
+    Distills logged plans into the local ranking model.
+    By default only plans the LLM actually produced are used: cache- and ranker-served plans would
+    train the ranker on its own output, and greedy plans must be opted into via `sources`.
+    outcomes=True also learns from outcome comparisons between plans for equivalent task sets.
+    """
+    sources = sources or DEFAULT_SOURCES
+    records = load_plan_log(log_path, sources)
+    print(f"Loaded {len(records)} logged plans from {log_path} (sources: {', '.join(sources)})")
+    if not records:
+        print("Nothing to train on. Run evaluate_models.py (with --llm-only for pure LLM plans) first.")
+        return
+
+    # 1. Train / holdout split
+    rng = np.random.default_rng(seed)
+    idx = rng.permutation(len(records))
+    n_test = int(len(records) * holdout)
+    test = [records[i] for i in idx[:n_test]]
+    train_set = [records[i] for i in idx[n_test:]]
+
+    # 2. Fit
+    start = time.time()
+    model = train(train_set, iterations=iterations, outcomes=outcomes)
+    print(f"Trained on {len(train_set)} plans in {time.time() - start:.2f}s")
+
+    # 3. Report
+    print(f"Pairwise agreement (train): {pairwise_accuracy(model, train_set)*100:.1f}%")
+    if test:
+        print(f"Pairwise agreement (holdout): {pairwise_accuracy(model, test)*100:.1f}%")
+    print("\n--- Feature Weights ---")
+    for name, w in zip(FEATURE_NAMES, model.weights):
+        print(f"  {name:<28}{w:+.3f}")
+
+    sample = records[0]
+    tasks = [Task.model_construct(description="", **t) for t in sample["tasks"]]
+    user = UserProfile(**sample["user"])
+    start = time.perf_counter()
+    for _ in range(1000):
+        model.rank(tasks, user)
+    print(f"\nInference: {(time.perf_counter() - start) * 1000:.1f}us per plan ({len(tasks)} tasks)")
+
+    model.save(model_path)
+    print(f"Model saved to {model_path}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the local ranking model from logged plans.")
+    parser.add_argument("--log", default=PLAN_LOG_FILE)
+    parser.add_argument("--model", default=MODEL_FILE)
+    parser.add_argument("--sources", nargs="+", default=None,
+                        help="Plan sources to learn from (default: llm). Add greedy to also imitate the baseline, "
+                             "e.g. --sources llm greedy")
+    parser.add_argument("--no-outcomes", action="store_true",
+                        help="Imitation pairs only (skip outcome comparisons between equivalent task sets)")
+    parser.add_argument("--holdout", type=float, default=0.2)
+    parser.add_argument("--iterations", type=int, default=25, help="Newton steps")
+    args = parser.parse_args()
+
+    main(args.log, args.model, args.sources, args.holdout, args.iterations, outcomes=not args.no_outcomes)